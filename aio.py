@@ -0,0 +1,33 @@
+# ⚡ Concurrent fetches for the bot loop (ASYNC_LOOP=1)
+# An asyncio event loop on its own thread, fed blocking calls through a thread pool:
+# a full pass puts the ticker and the candles (and REST top of book) of every flat
+# symbol that can still trade in flight together, so a decision waits on one round trip instead of one per fetch.
+# The calls stay on the synchronous clients so they keep going through the gateway
+# (weight budget, retries, coalescing) and the KlineCache; the strategy functions
+# then run unchanged on the already-filled MarketSnapshots.
+import asyncio, functools, threading
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncRunner:
+    def __init__(self, workers=16):
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(ThreadPoolExecutor(workers, thread_name_prefix='aio'))
+        self.batches = self.calls = 0
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def gather(self, *fns):
+        # run the blocking callables concurrently; an exception comes back in place of its result
+        self.batches += 1
+        self.calls += len(fns)
+        return asyncio.run_coroutine_threadsafe(_gather(fns), self.loop).result()
+
+    def stats(self):
+        return {'batches': self.batches, 'calls': self.calls}
+
+async def _gather(fns):
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(None, fn) for fn in fns), return_exceptions=True)
+
+def snapshot_calls(snap, intervals, top=True):
+    # fills the snapshot's per-interval candles and (top=True) top of book; MarketSnapshot caches each on first access
+    return [functools.partial(snap.__getitem__, i) for i in intervals] + ([snap.top] if top else [])
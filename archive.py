@@ -0,0 +1,155 @@
+# 🗄 Local candle archive
+# Closed klines on disk as fixed-width binary records, one file per
+# <root>/<SYMBOL>/<interval>/<YYYY-MM-DD>.bin (UTC day), opened with np.memmap.
+# Reads inside one day are zero-copy slices of the mapping; ranges that span days
+# are concatenated. `python archive.py sync` fetches only what is missing: the
+# tail after the last stored candle plus any holes in between.
+import argparse, glob, os, time
+from datetime import datetime, timezone
+import numpy as np
+from ratelimit import klines_weight
+
+DTYPE = np.dtype([('open_time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+                  ('volume', '<f8'), ('close_time', '<i8'), ('quote_asset_volume', '<f8'),
+                  ('number_of_trades', '<i8'), ('taker_buy_base', '<f8'), ('taker_buy_quote', '<f8')])
+DAY_MS = 86_400_000
+SYNC_LIMIT = 499   # weight 2 per 499 candles: the cheapest weight-per-candle futures_klines tier
+UNITS = {'m': 60_000, 'h': 3_600_000, 'd': DAY_MS, 'w': 7 * DAY_MS}
+
+def interval_ms(interval):
+    return int(interval[:-1]) * UNITS[interval[-1]]
+
+def to_records(raw):
+    # futures_klines rows -> DTYPE records (the trailing 'ignore' field is dropped)
+    out = np.empty(len(raw), DTYPE)
+    for i, name in enumerate(DTYPE.names):
+        out[name] = [k[i] for k in raw]
+    return out
+
+def to_rows(rec):
+    # DTYPE records -> lists shaped like KlineCache / get_klines rows
+    return [list(r) + ['0'] for r in rec.tolist()]
+
+def _day(ms):
+    return datetime.fromtimestamp(ms // 1000, timezone.utc).strftime('%Y-%m-%d')
+
+def _day_start(day):
+    return int(datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+class CandleArchive:
+    def __init__(self, root='candles', client=None, budget=None):
+        self.root, self.client, self.budget = root, client, budget
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def days(self, symbol, interval):
+        return sorted(os.path.basename(f)[:-4] for f in glob.glob(os.path.join(self._dir(symbol, interval), '*.bin')))
+
+    def _map(self, symbol, interval, day):
+        path = os.path.join(self._dir(symbol, interval), day + '.bin')
+        if not os.path.exists(path) or os.path.getsize(path) < DTYPE.itemsize: return np.empty(0, DTYPE)
+        return np.memmap(path, DTYPE, mode='r', shape=(os.path.getsize(path) // DTYPE.itemsize,))
+
+    # ✍️ Write
+    def write(self, symbol, interval, rec):
+        # rec sorted by open_time; appended when it extends a day, else the day is merged and replaced
+        d = self._dir(symbol, interval)
+        os.makedirs(d, exist_ok=True)
+        day_no = rec['open_time'] // DAY_MS
+        for n in np.unique(day_no):
+            part, day = rec[day_no == n], _day(int(n) * DAY_MS)
+            path = os.path.join(d, day + '.bin')
+            old = self._map(symbol, interval, day)
+            if not len(old) or part['open_time'][0] > old['open_time'][-1]:
+                with open(path, 'ab') as f: f.write(part.tobytes())
+                continue
+            merged = np.concatenate([np.asarray(old), part])
+            _, idx = np.unique(merged['open_time'][::-1], return_index=True)   # newest copy of each candle wins
+            merged = merged[len(merged) - 1 - idx]
+            del old
+            with open(path + '.tmp', 'wb') as f: f.write(merged.tobytes())
+            os.replace(path + '.tmp', path)
+
+    # 📖 Read
+    def read(self, symbol, interval, start=None, end=None):
+        # Candles with start <= open_time < end (ms); a single-day range is a view into the mmap
+        days = self.days(symbol, interval)
+        if start is not None: days = [d for d in days if _day_start(d) + DAY_MS > start]
+        if end is not None: days = [d for d in days if _day_start(d) < end]
+        parts = [self._map(symbol, interval, d) for d in days]
+        rec = parts[0] if len(parts) == 1 else np.concatenate(parts) if parts else np.empty(0, DTYPE)
+        t = rec['open_time']
+        lo = 0 if start is None else np.searchsorted(t, start)
+        hi = len(rec) if end is None else np.searchsorted(t, end)
+        return rec[lo:hi]
+
+    def tail(self, symbol, interval, limit=100):
+        # Last `limit` candles, walking back only as many day files as needed
+        days, parts, n = self.days(symbol, interval), [], 0
+        while days and n < limit:
+            parts.insert(0, self._map(symbol, interval, days.pop()))
+            n += len(parts[0])
+        if not parts: return np.empty(0, DTYPE)
+        rec = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return rec[-limit:]
+
+    def get(self, symbol, interval, limit=100):
+        # get_klines-compatible rows
+        return to_rows(self.tail(symbol, interval, limit))
+
+    def gaps(self, symbol, interval, start=None):
+        # (from, to) open_time ranges missing between stored candles
+        step = interval_ms(interval)
+        t = self.read(symbol, interval, start)['open_time']
+        if len(t) < 2: return []
+        holes = np.nonzero(np.diff(t) > step)[0]
+        return [(int(t[i]) + step, int(t[i + 1])) for i in holes]
+
+    # 🔄 Sync
+    def _fetch_range(self, symbol, interval, start, end):
+        now, got = int(time.time() * 1000), 0
+        while start < end:
+            if self.budget: self.budget.acquire(klines_weight(SYNC_LIMIT))
+            raw = self.client.futures_klines(symbol=symbol, interval=interval, startTime=start, endTime=end - 1, limit=SYNC_LIMIT)
+            raw = [k for k in raw if k[6] < now]   # closed candles only
+            if not raw: break
+            self.write(symbol, interval, to_records(raw))
+            got += len(raw)
+            start = raw[-1][0] + interval_ms(interval)
+            if len(raw) < SYNC_LIMIT: break
+        return got
+
+    def sync(self, symbol, interval, since=None):
+        # Fill holes, then extend to the last closed candle; `since` (ms) only matters for an empty archive
+        symbol = symbol.upper()
+        got = sum(self._fetch_range(symbol, interval, a, b) for a, b in self.gaps(symbol, interval))
+        last = self.tail(symbol, interval, 1)
+        start = int(last['open_time'][0]) + interval_ms(interval) if len(last) else since or int(time.time() * 1000) - 30 * DAY_MS
+        return got + self._fetch_range(symbol, interval, start, int(time.time() * 1000))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local memory-mapped kline archive")
+    ap.add_argument('command', choices=['sync', 'info'])
+    ap.add_argument('symbols', nargs='+')
+    ap.add_argument('--intervals', nargs='+', default=['5m', '1h', '1d'])
+    ap.add_argument('--since', help="YYYY-MM-DD start for symbols with no local data (default: last 30 days)")
+    ap.add_argument('--root', default=os.getenv("CANDLE_ARCHIVE", "candles"))
+    args = ap.parse_args()
+
+    client = None
+    if args.command == 'sync':
+        from binance.client import Client
+        from ratelimit import WeightBudget
+        client = Client()
+    archive = CandleArchive(args.root, client, WeightBudget() if client else None)
+    for sym in args.symbols:
+        for interval in args.intervals:
+            if args.command == 'sync':
+                t0 = time.time()
+                n = archive.sync(sym, interval, since=_day_start(args.since) if args.since else None)
+                print(f"{sym.upper()} {interval}: +{n} candles in {time.time() - t0:.1f}s")
+            else:
+                days, rec = archive.days(sym, interval), archive.tail(sym, interval, 1)
+                last = datetime.fromtimestamp(rec['open_time'][0] // 1000, timezone.utc) if len(rec) else None
+                print(f"{sym.upper()} {interval}: {len(days)} days, last candle {last}, {len(archive.gaps(sym, interval))} gaps")
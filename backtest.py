@@ -0,0 +1,281 @@
+# 🧪 Vectorized backtester
+# Replays the live rules of botTB / botTBA / botTBS over local 5m candle files:
+#  - indicators for the whole history are computed once as NumPy arrays; the 1h
+#    candle is rebuilt from the 5m data and its RSI/BB are evaluated on the forming
+#    hour exactly like check_signal sees it (previous closed hours + current price)
+#  - entry signals for every bar come out of one vectorized pass
+#  - only the path-dependent part (pending stop, SL/TP/tiered trailing exit, daily
+#    target/loss limit, TP cooldown, SL-streak pause) runs bar by bar, and idle
+#    stretches are skipped straight to the next signal.
+#  - the working stop follows pending.PendingOrders: later signals re-point it
+#    (small moves keep it) and its expiry scales with the distance to the trigger
+#    in 5m ATRs, checked at each bar close.
+# Decisions are taken at 5m bar closes; inside a bar price is walked
+# open -> low -> high -> close (bullish bar) or open -> high -> low -> close.
+# The FinBERT gate of botTBS cannot be replayed, so 'tbs' runs the botTB rules
+# with botTBS's non-sticky trail (back to no trail under the lowest tier).
+import argparse, glob, os
+from collections import deque
+import numpy as np, pandas as pd
+from pending import PendingOrders
+
+MIN5, HOUR, DAY = 300_000, 3_600_000, 86_400_000
+TZ_OFFSET = HOUR   # the bots gate minutes and reset the day on UTC+1
+TREND_BUY, TREND_SELL, REVERSAL_BUY, REVERSAL_SELL = 1, 2, 3, 4
+SIGNAL_NAMES = {TREND_BUY: 'trend_buy', TREND_SELL: 'trend_sell', REVERSAL_BUY: 'reversal_buy', REVERSAL_SELL: 'reversal_sell'}
+EXIT_REASONS = ('Trailing Stop Hit', 'Take Profit Hit', 'Stop Loss Hit', 'End of data')
+TRADE_DTYPE = [('signal_time', 'i8'), ('entry_time', 'i8'), ('exit_time', 'i8'), ('signal', 'i1'), ('stop', 'f8'),
+               ('sl', 'f8'), ('tp', 'f8'), ('entry', 'f8'), ('exit', 'f8'), ('pnl', 'f8'), ('reason', 'i1')]
+
+DEFAULTS = {
+    'rsi_lo': 47, 'rsi_hi': 53, 'entry_buffer': 0.8, 'tp_offset': 100,
+    'trail_tiers': ((0.03, 0.015), (0.02, 0.01), (0.01, 0.005)),
+    'min_trend_volume': None, 'daily_target': 1200, 'daily_loss_limit': -700,
+    'no_entry_minute': 50, 'order_expiry': 600, 'amend_interval': 30, 'atr_move': 0.25,
+    'tp_cooldown': 30 * 60, 'sl_streak': 4, 'sl_pause': 60 * 60, 'sticky_trail': True,
+}
+PRESETS = {
+    'tb': {},
+    'tbs': {'sticky_trail': False},
+    'tba': {'min_trend_volume': 500, 'daily_target': 4200, 'daily_loss_limit': -2000},
+}
+
+# 📂 Data
+def load_candles(paths):
+    files = sorted(f for p in paths for f in (glob.glob(os.path.join(p, '*.csv')) if os.path.isdir(p) else glob.glob(p)))
+    if not files: raise FileNotFoundError(f"no candle files in {paths}")
+    df = pd.concat([pd.read_csv(f, header=None, usecols=range(10)) for f in files], ignore_index=True)
+    df = df.apply(pd.to_numeric, errors='coerce').dropna(subset=[0])   # drops header rows of newer dumps
+    df = df.sort_values(0).drop_duplicates(0)
+    return {'time': df[0].to_numpy(np.int64), 'open': df[1].to_numpy(float), 'high': df[2].to_numpy(float),
+            'low': df[3].to_numpy(float), 'close': df[4].to_numpy(float), 'volume': df[5].to_numpy(float),
+            'taker_buy_base': df[9].to_numpy(float)}
+
+def load_archive(root, symbol, start=None, end=None):
+    # Same arrays from a CandleArchive; the columns are views of the mmap when the range fits one day
+    from archive import CandleArchive
+    rec = CandleArchive(root).read(symbol, '5m', start, end)
+    if not len(rec): raise FileNotFoundError(f"no 5m candles for {symbol} in {root}")
+    return {'time': rec['open_time'], 'open': rec['open'], 'high': rec['high'], 'low': rec['low'],
+            'close': rec['close'], 'volume': rec['volume'], 'taker_buy_base': rec['taker_buy_base']}
+
+# 📈 Indicators (same math as ta.momentum.rsi / ta.volatility.BollingerBands)
+def _wilder(x, window):
+    return pd.Series(x).ewm(alpha=1 / window, adjust=False).mean().to_numpy()
+
+def _up_down(close):
+    d = np.diff(close, prepend=np.nan)
+    return np.where(d > 0, d, 0.0), np.where(d < 0, -d, 0.0)
+
+def _rsi(avg_up, avg_dn):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(avg_dn == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_up / avg_dn))
+
+def prepare(c5, rsi_window=14, bb_window=20, bb_dev=2, atr_window=14):
+    t, o, c = c5['time'], c5['open'], c5['close']
+    a = dict(c5)
+    up, dn = _up_down(c)
+    a['rsi5'] = _rsi(_wilder(up, rsi_window), _wilder(dn, rsi_window))
+    a['rsi5'][:rsi_window - 1] = np.nan
+    s = pd.Series(c)
+    mid, sd = s.rolling(bb_window).mean().to_numpy(), s.rolling(bb_window).std(ddof=0).to_numpy()
+    a['mid5'], a['hi5'], a['lo5'] = mid, mid + bb_dev * sd, mid - bb_dev * sd
+    # Wilder ATR seeded with the mean of the first window (ta.volatility.average_true_range)
+    h, l, pc = c5['high'], c5['low'], np.r_[np.nan, c[:-1]]
+    tr = np.fmax(h - l, np.fmax(np.abs(h - pc), np.abs(l - pc)))
+    a['atr5'] = np.full(len(c), np.nan)
+    if len(c) >= atr_window:
+        seeded = np.r_[tr[:atr_window].mean(), tr[atr_window:]]
+        a['atr5'][atr_window - 1:] = pd.Series(seeded).ewm(alpha=1 / atr_window, adjust=False).mean().to_numpy()
+
+    # forming 1h candle: closed hours up to the previous one + the current 5m close
+    hid = t // HOUR
+    starts = np.flatnonzero(np.r_[True, hid[1:] != hid[:-1]])
+    ends = np.r_[starts[1:], len(t)] - 1
+    o1, c1 = o[starts], c[ends]
+    j = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(t)]))
+    pj = np.maximum(j - 1, 0)
+    up1, dn1 = _up_down(c1)
+    au, ad = _wilder(up1, rsi_window), _wilder(dn1, rsi_window)
+    d = c - c1[pj]
+    alpha = 1 / rsi_window
+    f_up = au[pj] + alpha * (np.where(d > 0, d, 0.0) - au[pj])
+    f_dn = ad[pj] + alpha * (np.where(d < 0, -d, 0.0) - ad[pj])
+    a['rsi1h'] = np.where(j >= rsi_window - 1, _rsi(f_up, f_dn), np.nan)
+    s1 = pd.Series(c1)
+    m_prev = s1.rolling(bb_window - 1).mean().to_numpy()[pj]
+    v_prev = s1.rolling(bb_window - 1).var(ddof=0).to_numpy()[pj]
+    delta = c - m_prev
+    m = m_prev + delta / bb_window
+    sd1 = np.sqrt(np.maximum(v_prev * (bb_window - 1) + delta * (c - m), 0.0) / bb_window)
+    ok = j >= bb_window - 1
+    a['open1h'] = o1[j]
+    a['mid1h'] = np.where(ok, m, np.nan)
+    a['hi1h'] = np.where(ok, m + bb_dev * sd1, np.nan)
+    a['lo1h'] = np.where(ok, m - bb_dev * sd1, np.nan)
+    a['minute'] = ((t + MIN5 + TZ_OFFSET) // 60_000) % 60
+    return a
+
+# 📊 Entry rules (check_signal, vectorized)
+def signals(a, p):
+    c, o, c1, o1 = a['close'], a['open'], a['close'], a['open1h']
+    allow = np.ones(len(c), bool) if p['min_trend_volume'] is None else a['volume'] >= p['min_trend_volume']
+    lo, hi = p['rsi_lo'], p['rsi_hi']
+    neutral = ((lo <= a['rsi5']) & (a['rsi5'] <= hi)) | ((lo <= a['rsi1h']) & (a['rsi1h'] <= hi))
+    extreme = (c1 >= a['hi1h']) | (c1 <= a['lo1h'])
+    blocked = (a['minute'] >= p['no_entry_minute']) | (allow & (neutral | extreme))
+    sig = np.select([
+        allow & (c > a['mid5']) & (c < a['hi5']) & (c > o) & (c1 > o1),
+        allow & (c < a['mid5']) & (c > a['lo5']) & (c < o) & (c1 < o1),
+        (c < a['mid5']) & (c > o) & (c1 > o1),
+        (c > a['mid5']) & (c < o) & (c1 < o1),
+    ], [TREND_BUY, TREND_SELL, REVERSAL_BUY, REVERSAL_SELL], 0)
+    sig[blocked] = 0
+    return sig.astype(np.int8)
+
+# 🔄 Exit rules (manage_trade)
+def bar_path(o, h, l, c):
+    return (o, l, h, c) if c >= o else (o, h, l, c)
+
+def exit_check(pos, price, tiers, sticky=True):
+    # pos = [entry, is_long, sl, tp, peak, trail_stop, trail_pct]; returns an EXIT_REASONS index or -1
+    # sticky=False (botTBS): under the lowest tier the trail drops back to none, as in manage_trade
+    entry, is_long = pos[0], pos[1]
+    pct = abs((price - entry) / entry)
+    for level, trail in tiers:
+        if pct >= level:
+            pos[6] = trail
+            break
+    else:
+        if not sticky: pos[6] = 0.0
+    if is_long:
+        if pos[4] is None or price > pos[4]:
+            pos[4] = price
+            pos[5] = price * (1 - pos[6])
+        if pos[6] and pos[5] and price <= pos[5]: return 0
+        if pos[3] and price >= pos[3]: return 1
+        if pos[2] and price <= pos[2]: return 2
+    else:
+        if pos[4] is None or price < pos[4]:
+            pos[4] = price
+            pos[5] = price * (1 + pos[6])
+        if pos[6] and pos[5] and price >= pos[5]: return 0
+        if pos[3] and price <= pos[3]: return 1
+        if pos[2] and price >= pos[2]: return 2
+    return -1
+
+# 🚀 Replay
+def run(a, strategy='tb', params=None, sig=None):
+    p = {**DEFAULTS, **PRESETS[strategy], **(params or {})}
+    if sig is None: sig = signals(a, p)
+    tiers, sticky = sorted(p['trail_tiers'], reverse=True), p['sticky_trail']
+    t = a['time']
+    o, h, l, c = a['open'].tolist(), a['high'].tolist(), a['low'].tolist(), a['close'].tolist()
+    n, idx, atr = len(t), np.flatnonzero(sig), a['atr5'].tolist()
+    po = PendingOrders(None, p['order_expiry'], p['amend_interval'], p['atr_move'])
+    day, day_pnl, target_hit = None, 0.0, False
+    resume_at, losses, trades = 0, deque(maxlen=p['sl_streak']), []
+
+    def order(j):
+        # place_order: stop entry, SL and TP for the signal at bar j
+        s = int(sig[j]); buy, trend = s in (TREND_BUY, REVERSAL_BUY), s in (TREND_BUY, TREND_SELL)
+        stop = round(c[j] + p['entry_buffer'], 2) if buy else round(c[j] - p['entry_buffer'], 2)
+        sl = float(a['open1h'][j]) if trend else o[j]
+        if trend: base = float(a['hi5'][j]) if buy else float(a['lo5'][j])
+        else: base = float(a['mid5'][j])
+        return s, buy, stop, sl, round(base + p['tp_offset'] if buy else base - p['tp_offset'], 2)
+
+    i = 0
+    while True:
+        k = np.searchsorted(idx, i)
+        if k >= len(idx): break
+        i = int(idx[k])
+        now = int(t[i]) + MIN5
+        d = (now + TZ_OFFSET) // DAY
+        if d != day: day, day_pnl, target_hit = d, 0.0, False
+        if target_hit:
+            i = int(np.searchsorted(t, (day + 1) * DAY - TZ_OFFSET - MIN5)); continue
+        if now < resume_at:
+            i = int(np.searchsorted(t, resume_at - MIN5)); continue
+        s, buy, stop, sl, tp = order(i)
+
+        # ⏱ working stop: fills on the first touch; at each bar close it expires (ttl_for the
+        # distance in ATRs) or a new signal re-points it, as PendingOrders.submit does
+        fill_bar = fill_step = None
+        placed, b = now, i
+        while b + 1 < n:
+            b += 1
+            path = bar_path(o[b], h[b], l[b], c[b])
+            for m, px in enumerate(path):
+                if (px >= stop) if buy else (px <= stop):
+                    fill_bar, fill_step = b, m
+                    break
+            if fill_bar is not None: break
+            closed = int(t[b]) + MIN5
+            age = (closed - placed) / 1000
+            if age > po.ttl_for(abs(stop - c[b]), atr[b]): break
+            if not sig[b]: continue
+            s2, buy2, stop2, sl2, tp2 = order(b)
+            if buy2 == buy and (abs(stop2 - stop) < po.min_move(p['entry_buffer'], atr[b]) or age < po.min_interval): continue
+            i, placed, s, buy, stop, sl, tp = b, closed, s2, buy2, stop2, sl2, tp2
+        if fill_bar is None:
+            if b + 1 >= n: break
+            i = b; continue   # expired: a signal on this bar places a fresh order
+        path = bar_path(o[fill_bar], h[fill_bar], l[fill_bar], c[fill_bar])
+        entry = path[0] if fill_step == 0 else stop   # gapped through the stop at the open
+
+        # 🔄 manage until an exit rule fires
+        pos, reason, exit_px, b = [entry, buy, sl, tp, entry, None, 0.0], -1, None, fill_bar
+        steps = path[fill_step:]
+        while True:
+            for px in steps:
+                reason = exit_check(pos, px, tiers, sticky)
+                if reason >= 0:
+                    exit_px = px
+                    break
+            if reason >= 0 or b == n - 1: break
+            b += 1
+            steps = bar_path(o[b], h[b], l[b], c[b])
+        if reason < 0: reason, exit_px = 3, c[b]
+
+        # ❌ close_position bookkeeping
+        pnl = round((exit_px - entry) if buy else (entry - exit_px), 2)
+        closed = int(t[b]) + MIN5
+        trades.append((int(t[i]) + MIN5, int(t[fill_bar]), closed, s, stop, sl, tp, entry, exit_px, pnl, reason))
+        if (closed + TZ_OFFSET) // DAY != day: day, day_pnl, target_hit = (closed + TZ_OFFSET) // DAY, 0.0, False
+        day_pnl += pnl
+        if reason == 2:
+            losses.append(1)
+            if len(losses) == losses.maxlen: resume_at = max(resume_at, closed + p['sl_pause'] * 1000)
+        else:
+            losses.clear()
+        if reason == 1: resume_at = max(resume_at, closed + p['tp_cooldown'] * 1000)
+        if day_pnl >= p['daily_target'] or day_pnl <= p['daily_loss_limit']: target_hit = True
+        i = b + 1
+    return np.array(trades, dtype=TRADE_DTYPE)
+
+def summarize(trades):
+    pnl = trades['pnl']
+    equity = np.cumsum(pnl)
+    gains, losses = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+    return {
+        'trades': len(pnl), 'pnl': round(float(pnl.sum()), 2),
+        'win_rate': round(float((pnl > 0).mean() * 100), 1) if len(pnl) else 0.0,
+        'max_drawdown': round(float((np.maximum.accumulate(np.r_[0.0, equity]) - np.r_[0.0, equity]).max()), 2),
+        'profit_factor': round(float(gains / losses), 2) if losses else float('inf'),
+        'by_signal': {SIGNAL_NAMES[k]: round(float(pnl[trades['signal'] == k].sum()), 2) for k in SIGNAL_NAMES},
+        'by_reason': {EXIT_REASONS[k]: int((trades['reason'] == k).sum()) for k in range(len(EXIT_REASONS))},
+    }
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Backtest the bot rules on local 5m kline CSVs (Binance dump format)")
+    ap.add_argument('paths', nargs='*', help="CSV files, globs or directories of 5m klines")
+    ap.add_argument('--archive', help="read 5m candles of --symbol from this candle archive instead")
+    ap.add_argument('--symbol', default='BTCUSDT')
+    ap.add_argument('--strategy', choices=sorted(PRESETS), default='tba')
+    ap.add_argument('--trades', help="write the trade list to this CSV")
+    args = ap.parse_args()
+    candles = load_archive(args.archive, args.symbol) if args.archive else load_candles(args.paths)
+    trades = run(prepare(candles), args.strategy)
+    if args.trades: pd.DataFrame(trades).to_csv(args.trades, index=False)
+    for k, v in summarize(trades).items(): print(f"{k}: {v}")
@@ -0,0 +1,238 @@
+# ⏱ Hot-path benchmarks
+# Runs each bot's strategy on an Engine built against a fake Binance client that replays recorded
+# (or synthetic) klines and order books, then times the per-candle/per-tick paths:
+# kline parsing, get_klines, add_indicators, check_signal (on a fresh snapshot),
+# place_order (SL/TP sizing on the decision snapshot) and manage_trade (trailing
+# logic). Each case reports latency percentiles, throughput and tracemalloc
+# allocations; --save stores a baseline and later runs flag cases that got
+# slower than --threshold. --startup instead times each bot's cold start in a
+# fresh interpreter: module import, Engine() + the first `/` response (what the
+# platform health check waits for), the heavy modules loaded by then, and the
+# warm_up() steps against the fake client.
+#   python bench.py --record bench_fixture.json      # capture live public data once
+#   python bench.py --fixture bench_fixture.json --save
+#   python bench.py --fixture bench_fixture.json     # compare against the baseline
+import argparse, importlib, json, math, os, random, subprocess, sys, tempfile, time, tracemalloc
+import requests
+
+INTERVAL_MS = {'5m': 300_000, '1h': 3_600_000, '1d': 86_400_000}
+BOTS = ('botTB', 'botTBA', 'botTBS')
+HEAVY = ('binance', 'pandas', 'ta', 'gspread', 'oauth2client', 'torch', 'transformers')
+
+# 🎭 Fake client
+def synthetic_klines(interval, n=500, start_price=60000.0, seed=7):
+    rng, step = random.Random(seed + len(interval)), INTERVAL_MS[interval]
+    t0 = (int(time.time() * 1000) // step - n + 1) * step
+    rows, price = [], start_price
+    for i in range(n):
+        o = price
+        c = o * (1 + rng.gauss(0, 0.002 * math.sqrt(step / 300_000)))
+        h, l = max(o, c) * (1 + abs(rng.gauss(0, 0.0007))), min(o, c) * (1 - abs(rng.gauss(0, 0.0007)))
+        v = abs(rng.gauss(400, 150)) * step / 300_000
+        rows.append([t0 + i * step, f"{o:.2f}", f"{h:.2f}", f"{l:.2f}", f"{c:.2f}", f"{v:.3f}", t0 + (i + 1) * step - 1,
+                     f"{v * c:.2f}", int(v * 20), f"{v * rng.uniform(0.3, 0.7):.3f}", "0", "0"])
+        price = c
+    return rows
+
+class FakeClient:
+    # Serves futures_* calls from a fixture {'klines': {interval: rows}, 'order_book': {...}}
+    def __init__(self, fixture):
+        self.klines, self.book = fixture['klines'], fixture['order_book']
+        self.response, self.calls, self._order_id = None, {}, 0
+        self.session = requests.Session()   # the gateway mounts its pool here; futures_* below never reach it
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def futures_klines(self, symbol, interval, limit=500, startTime=None, **kw):
+        self._count('futures_klines')
+        rows = self.klines[interval]
+        if startTime is not None: return [r for r in rows if r[0] >= startTime][:limit]
+        return rows[-limit:]
+
+    def futures_order_book(self, symbol, **kw):
+        self._count('futures_order_book')
+        return self.book
+
+    def futures_exchange_info(self, **kw):
+        self._count('futures_exchange_info')
+        return {'symbols': [{'symbol': 'BTCUSDT', 'filters': [{'filterType': 'PRICE_FILTER', 'tickSize': '0.10'}]}]}
+
+    def futures_orderbook_ticker(self, symbol, **kw):
+        self._count('futures_orderbook_ticker')
+        return {'symbol': symbol, 'bidPrice': self.book['bids'][0][0], 'askPrice': self.book['asks'][0][0]}
+
+    def futures_symbol_ticker(self, symbol=None, **kw):
+        self._count('futures_symbol_ticker')
+        price = self.klines['5m'][-1][4]
+        return {'symbol': symbol, 'price': price} if symbol else [{'symbol': 'BTCUSDT', 'price': price}]
+
+    def futures_create_order(self, **kw):
+        self._count('futures_create_order')
+        self._order_id += 1
+        return {'orderId': self._order_id, 'status': 'NEW'}
+
+    def futures_get_order(self, symbol, orderId, **kw):
+        return {'orderId': orderId, 'status': 'NEW', 'stopPrice': '0'}
+
+    def futures_cancel_order(self, **kw): self._count('futures_cancel_order')
+    def futures_change_leverage(self, **kw): pass
+
+def record(path, symbol):
+    from binance.client import Client
+    client = Client()
+    fixture = {'symbol': symbol, 'recorded': int(time.time() * 1000),
+               'klines': {i: client.futures_klines(symbol=symbol, interval=i, limit=500) for i in INTERVAL_MS},
+               'order_book': client.futures_order_book(symbol=symbol, limit=5)}
+    with open(path, 'w') as f: json.dump(fixture, f)
+    print(f"recorded {symbol} klines {', '.join(INTERVAL_MS)} + order book -> {path}")
+
+def load_fixture(path):
+    if path:
+        with open(path) as f: return json.load(f)
+    c = float(synthetic_klines('5m')[-1][4])
+    return {'klines': {i: synthetic_klines(i) for i in INTERVAL_MS},
+            'order_book': {'bids': [[f"{c - 0.05:.2f}", "3.1"]], 'asks': [[f"{c + 0.05:.2f}", "2.7"]]}}
+
+def import_bot(name, fixture):
+    # Engines build their clients on construction; swap in the fake and silence Telegram / Sheets / sentiment
+    import sentiment, engine
+    engine.make_client = lambda *a, **kw: FakeClient(fixture)
+    sentiment.SentimentService._run = lambda self: None
+    os.environ.setdefault("SYMBOLS", "BTCUSDT")
+    os.environ.pop("STREAM_MODE", None)
+    tmp = tempfile.mkdtemp()   # never touch the live journal / rollups
+    os.environ["STATE_JOURNAL"], os.environ["PNL_ROLLUPS"] = os.path.join(tmp, "state_journal.jsonl"), os.path.join(tmp, "pnl_rollups.jsonl")
+    bot = importlib.import_module(name)
+    eng = engine.Engine([bot.STRATEGY()])
+    eng.warm_up()
+    eng.notifier.send = lambda msg: None
+    eng.sheet_logger.log = lambda row: None
+    eng.kline_cache.min_refresh = 1e9   # candles stay put; a live bot mostly hits the cache too
+    eng.weight_budget.capacity = eng.weight_budget.tokens = float('inf')   # time the code, not the rate limiter
+    return bot, eng
+
+# 📏 Cases
+def cases(bot, eng, fixture):
+    from klines import parse_kline
+    st = next(iter(eng.states.values()))
+    raw = fixture['klines']['5m']
+    df = eng.get_klines(st.symbol, '5m', 100)
+    price = float(raw[-1][4])
+    path = [price * (1 + 0.035 * math.sin(i / 40)) for i in range(400)]
+    tick = iter(range(10**12))
+    snap = eng.market_snapshot(st)   # decision-time snapshot: candles + top of book already pulled
+    for i in ('5m', '1h', '1d'): snap[i]
+    snap.top()
+
+    def place():
+        st.in_position, st.target_hit, st.pending_order_id = False, False, None
+        eng.place_order(st, 'trend_buy', snap)
+
+    def manage():
+        if not st.in_position:
+            st.in_position, st.trade_direction, st.entry_price = True, 'long', price
+            st.sl_price, st.tp_price = price * 0.9, price * 1.1
+            st.trailing_peak, st.trailing_stop_price, st.current_trail_percent = None, None, 0.0
+        eng.manage_trade(st, path[next(tick) % len(path)])
+
+    return {
+        'parse_kline x500': lambda: [parse_kline(k) for k in raw],
+        'get_klines': lambda: eng.get_klines(st.symbol, '5m', 100),
+        'add_indicators': lambda: bot.add_indicators(df.copy()),
+        'check_signal': lambda: eng.check_signal(st, eng.market_snapshot(st)),
+        'place_order': place,
+        'manage_trade': manage,
+    }
+
+# 🧊 Cold start
+COLD_START = '''
+import json, sys, time
+t0 = time.perf_counter()
+import importlib, engine
+bot = importlib.import_module(sys.argv[1])
+t1 = time.perf_counter()
+status = engine.Engine([bot.STRATEGY()]).app.test_client().get('/').status_code
+t2 = time.perf_counter()
+print(json.dumps([t1 - t0, t2 - t0, status, ','.join(m for m in sys.argv[2:] if m in sys.modules)]))
+'''
+
+def startup(name, fixture, runs=3):
+    # best of `runs` fresh interpreters (import caches are per process), then warm_up() in-process
+    best = None
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', COLD_START, name, *HEAVY], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or r[1] < best[1]: best = r
+    t0 = time.perf_counter()
+    _, eng = import_bot(name, fixture)
+    return {'import_s': best[0], 'first_response_s': best[1], 'status': best[2], 'heavy': best[3] or '-',
+            'warm_up_s': time.perf_counter() - t0, 'steps': eng.warm}
+
+def measure(fn, seconds=0.5, min_runs=20):
+    for _ in range(3): fn()   # warm caches
+    samples, deadline = [], time.perf_counter() + seconds
+    while len(samples) < min_runs or time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    runs = min(50, len(samples))
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(runs): fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    diff = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+    tracemalloc.stop()
+    return {'mean_us': sum(samples) / len(samples) * 1e6, 'p50_us': samples[len(samples) // 2] * 1e6,
+            'p99_us': samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6,
+            'per_s': len(samples) / sum(samples), 'peak_kb': peak / 1024, 'retained_b_per_call': diff / runs}
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the signal and exit hot paths of the bots")
+    ap.add_argument('--bots', nargs='+', choices=BOTS, default=list(BOTS))
+    ap.add_argument('--fixture', help="recorded fixture (default: synthetic candles)")
+    ap.add_argument('--record', metavar='PATH', help="record a fixture from the live public API and exit")
+    ap.add_argument('--symbol', default='BTCUSDT')
+    ap.add_argument('--seconds', type=float, default=0.5, help="timing budget per case")
+    ap.add_argument('--baseline', default='bench_baseline.json')
+    ap.add_argument('--save', action='store_true', help="write the results as the new baseline")
+    ap.add_argument('--threshold', type=float, default=1.25, help="flag cases slower than baseline x this")
+    ap.add_argument('--startup', action='store_true', help="time cold start (import, first response, warm-up) instead")
+    args = ap.parse_args()
+    if args.record: return record(args.record, args.symbol)
+
+    fixture = load_fixture(args.fixture)
+    if args.startup:
+        print(f"{'bot':<8}{'import s':>10}{'first / s':>11}{'warm-up s':>11}  heavy modules at first response / warm-up steps")
+        for name in args.bots:
+            r = startup(name, fixture)
+            print(f"{name:<8}{r['import_s']:>10.3f}{r['first_response_s']:>11.3f}{r['warm_up_s']:>11.3f}  {r['heavy']} / "
+                  + ", ".join(f"{k} {v:.3f}" for k, v in r['steps'].items()))
+        return
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f: baseline = json.load(f)
+    results, regressions = {}, []
+    print(f"{'case':<28}{'mean µs':>10}{'p50 µs':>10}{'p99 µs':>10}{'calls/s':>11}{'peak KB':>9}{'B/call':>9}  vs base")
+    for name in args.bots:
+        bot, eng = import_bot(name, fixture)
+        for case, fn in cases(bot, eng, fixture).items():
+            key = f"{name}.{case}"
+            r = results[key] = measure(fn, args.seconds)
+            base = baseline.get(key, {}).get('p50_us')
+            ratio = r['p50_us'] / base if base else None
+            if ratio and ratio > args.threshold: regressions.append(key)
+            print(f"{key:<28}{r['mean_us']:>10.1f}{r['p50_us']:>10.1f}{r['p99_us']:>10.1f}{r['per_s']:>11.0f}"
+                  f"{r['peak_kb']:>9.1f}{r['retained_b_per_call']:>9.0f}  {f'x{ratio:.2f}' if ratio else '-'}"
+                  f"{' ⚠️' if key in regressions else ''}")
+    if args.save:
+        with open(args.baseline, 'w') as f: json.dump(results, f, indent=1, sort_keys=True)
+        print(f"baseline saved -> {args.baseline}")
+    if regressions and not args.save:
+        print(f"{len(regressions)} case(s) slower than baseline x{args.threshold}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# 📚 Local order books
+# One book per symbol kept from the futures diff-depth stream (<sym>@depth@100ms)
+# as sorted price-level lists, so the best bid/ask is an index away and depth
+# within N bps of mid is one bisect plus a slice sum: the spread gate and the
+# imbalance filter cost no REST weight. Sync follows the Binance procedure:
+# buffer diffs, take a REST snapshot (limit 1000), drop diffs older than its
+# lastUpdateId, the first one applied must bridge it (U <= lastUpdateId <= u),
+# then apply each diff only if its pu is the previous u. A gap, a stale book or
+# a reconnect marks the book unsynced and queues a fresh snapshot.
+import queue, threading, time
+from bisect import bisect_left, bisect_right
+
+SNAPSHOT_LIMIT = 1000   # weight 20; only taken on start, gaps and reconnects
+MAX_BUFFER = 2000       # diffs held while a snapshot is in flight
+
+def _set(px, qty, price, q):
+    # quantities are absolute: 0 removes the level
+    i = bisect_left(px, price)
+    if i < len(px) and px[i] == price:
+        if q: qty[i] = q
+        else: del px[i], qty[i]
+    elif q:
+        px.insert(i, price)
+        qty.insert(i, q)
+
+class OrderBook:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bid_px, self.bid_qty = [], []   # ascending, best bid last
+        self.ask_px, self.ask_qty = [], []   # ascending, best ask first
+        self.last_id, self.synced, self.updated = None, False, 0.0
+        self._bridged = False   # a diff spanning the snapshot's lastUpdateId has been applied
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def _apply(self, ev):
+        for p, q in ev['b']: _set(self.bid_px, self.bid_qty, float(p), float(q))
+        for p, q in ev['a']: _set(self.ask_px, self.ask_qty, float(p), float(q))
+        self.last_id, self.updated, self._bridged = ev['u'], time.time(), True
+
+    def on_diff(self, ev):
+        # -> False when the book needs a (new) snapshot
+        with self._lock:
+            if not self.synced:
+                self._buffer.append(ev)
+                if len(self._buffer) > MAX_BUFFER: del self._buffer[0]
+                return True
+            if not self._bridged:
+                if ev['u'] < self.last_id: return True   # still older than the snapshot
+                gap = ev['U'] > self.last_id
+            else:
+                gap = ev['pu'] != self.last_id
+            if gap:
+                self.synced, self._buffer = False, [ev]
+                return False
+            self._apply(ev)
+            return True
+
+    def load(self, snap):
+        # REST snapshot + buffered diffs -> True when the book is in sync
+        last = snap['lastUpdateId']
+        with self._lock:
+            self.bid_px, self.bid_qty = [], []
+            self.ask_px, self.ask_qty = [], []
+            for p, q in reversed(snap['bids']):
+                self.bid_px.append(float(p)); self.bid_qty.append(float(q))
+            for p, q in snap['asks']:
+                self.ask_px.append(float(p)); self.ask_qty.append(float(q))
+            self.last_id, self.updated, self._bridged = last, time.time(), False
+            pending, self._buffer = [ev for ev in self._buffer if ev['u'] >= last], []
+            if pending and pending[0]['U'] > last: return False   # snapshot older than the stream: take another
+            for i, ev in enumerate(pending):
+                if i and ev['pu'] != self.last_id: return False
+                self._apply(ev)
+            self.synced = True
+            return True
+
+    def reset(self):
+        with self._lock: self.synced, self._buffer = False, []
+
+    # 📤 Queries (None while unsynced)
+    def top(self):
+        with self._lock:
+            if not (self.synced and self.bid_px and self.ask_px): return None
+            return self.bid_px[-1], self.ask_px[0]
+
+    def depth(self, bps=10):
+        # (bid qty, ask qty) within bps of mid
+        with self._lock:
+            if not (self.synced and self.bid_px and self.ask_px): return None
+            mid = (self.bid_px[-1] + self.ask_px[0]) / 2
+            return (sum(self.bid_qty[bisect_left(self.bid_px, mid * (1 - bps / 1e4)):]),
+                    sum(self.ask_qty[:bisect_right(self.ask_px, mid * (1 + bps / 1e4))]))
+
+    def imbalance(self, bps=10):
+        # (bids - asks) / (bids + asks) within bps of mid, in [-1, 1]; > 0 = bid-heavy
+        d = self.depth(bps)
+        return (d[0] - d[1]) / (d[0] + d[1]) if d and sum(d) else None
+
+class LocalBooks:
+    def __init__(self, client, symbols, stale_after=10):
+        self.client, self.stale_after = client, stale_after
+        self.books = {sym: OrderBook(sym) for sym in symbols}
+        self.events = self.snapshots = self.gaps = 0
+        self._resync, self._queued = queue.Queue(), set()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def on_depth(self, data):
+        # depthUpdate from the market stream (websocket thread)
+        book = self.books.get(data['s'])
+        if book is None: return
+        self.events += 1
+        if not book.on_diff(data): self.gaps += 1
+        if not book.synced: self._request(book.symbol)
+
+    def reset(self):
+        # after a reconnect: diffs were missed, every book starts over
+        for book in self.books.values(): book.reset()
+
+    def get(self, symbol):
+        book = self.books.get(symbol)
+        if book is None or not book.synced or time.time() - book.updated > self.stale_after: return None
+        return book
+
+    def top(self, symbol):
+        book = self.get(symbol)
+        return book.top() if book else None
+
+    def _request(self, symbol):
+        if symbol not in self._queued:
+            self._queued.add(symbol)
+            self._resync.put(symbol)
+
+    def _run(self):
+        while True:
+            sym = self._resync.get()
+            time.sleep(0.5)   # let a few diffs buffer so the snapshot lands inside them
+            ok = False
+            try:
+                ok = self.books[sym].load(self.client.futures_order_book(symbol=sym, limit=SNAPSHOT_LIMIT))
+                self.snapshots += 1
+            except Exception as e:
+                print(f"Order book snapshot failed ({sym}):", e)
+                time.sleep(5)
+            self._queued.discard(sym)   # diffs during the fetch were buffered, not re-requested
+            if not ok: self._request(sym)
+
+    def stats(self):
+        return {'events': self.events, 'snapshots': self.snapshots, 'gaps': self.gaps,
+                'synced': sum(b.synced for b in self.books.values())}
@@ -0,0 +1,480 @@
+# ⚙️ Trading engine shared by every strategy
+# Owns what botTB / botTBA / botTBS used to copy between them: clients behind the
+# gateway, kline cache + streaming indicators, websocket streams, per-symbol
+# state and journal, stop-order entries, trailing/SL/TP exits (local or on the
+# exchange), Telegram/Sheets reporting, the daily summary and the Flask app.
+# Strategies (strategy.Strategy) only supply signals, filters, stops and alert
+# detail. Several can run in one process on the same market data, each on its
+# own symbols:
+#   python botTBA.py                                   # one strategy on $SYMBOLS
+#   python engine.py botTB=BTCUSDT botTBA=ETHUSDT,SOLUSDT:0.1
+# (each symbol other than BTCUSDT with its price settings in $SYMBOL_PARAMS, see strategy.py)
+# Startup is two-phase so the platform health check passes right away: Engine()
+# only reads config and builds the Flask app; warm_up() (a background thread
+# under run()) does the heavy imports (python-binance, pandas, gspread are only
+# imported where they are used), the Binance clients (their constructor pings),
+# leverage, journal, candles and streams. /ready answers 503 until it is done.
+#   python bench.py --startup          # import / first response / warm-up times
+import importlib, os, sys, threading, time
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+load_dotenv()   # before the project modules: metrics (and others) read their flags at import
+from flask import Flask, Response, jsonify
+from klines import KlineCache, KLINE_COLUMNS
+from indicators import IndicatorFeed
+from streams import MarketStream
+from book import LocalBooks
+from orders import OrderTracker, FINAL_STATUSES
+from notify import TelegramNotifier
+from sheets import SheetLogger
+from state import SymbolState, TRADING_TZ, trading_day
+from ratelimit import WeightBudget
+from gateway import Gateway
+from snapshot import MarketSnapshot
+import aio
+from exits import ExitOrders
+from pending import PendingOrders
+from journal import StateJournal, reconcile
+from pnlstats import TradeStats, Rollups
+import metrics
+
+LOOP_INTERVAL = 120                 # REST pass every LOOP_INTERVAL s (also in stream mode)
+PENDING_TTL = 600                   # untriggered stop orders are canceled after ~10 minutes (2.5-20 by distance in ATRs)
+TP_COOLDOWN = timedelta(minutes=30)
+LOSS_PAUSE = timedelta(hours=1)     # after 4 SL in a row (per symbol)
+INTERVAL_ORDER = ('1m', '5m', '15m', '1h', '4h', '1d')
+
+def make_client(key, secret, **kw):
+    # ~0.8 s of imports and a ping per client: only ever called from warm_up
+    from binance.client import Client
+    return Client(key, secret, **kw)
+
+class Engine:
+    def __init__(self, strategies):
+        # ✅ Config (no network, no heavy imports: the clients and the rest come from warm_up)
+        self.key, self.secret = os.getenv("BINANCE_API_KEY"), os.getenv("BINANCE_API_SECRET")
+        self.weight_per_minute = int(os.getenv("WEIGHT_BUDGET", 1200))      # REST weight/min shared by all symbols
+        self.strategies, self.strategy = list(strategies), {}
+        for strat in self.strategies:
+            for sym in strat.symbols:
+                # one account position per symbol: two strategies on it would trade each other's fills
+                if sym in self.strategy: raise ValueError(f"{sym} is traded by both {self.strategy[sym].name} and {strat.name}")
+                self.strategy[sym] = strat
+        self.intervals = sorted({i for s in self.strategies for i in s.intervals}, key=INTERVAL_ORDER.index)
+        self.started, self.ready, self.warm = time.time(), threading.Event(), {}   # warm: step -> seconds (+ last error)
+        # built by warm_up, each only once: a retried warm-up must not start a second writer/sender thread
+        self.testnet_gateway = self.live_gateway = self.notifier = self.sheet_logger = self.rollups = None
+        self.kline_cache = self.books = self.market_stream = self.aio_runner = self.journal = None
+
+        # 🌐 Flask
+        self.app = Flask(__name__)
+        self.app.add_url_rule('/', 'home', lambda: "🚀 Bot is live.")
+        self.app.add_url_rule('/ready', 'ready', self.readiness)
+        self.app.add_url_rule('/metrics', 'metrics', lambda: Response(metrics.render(), mimetype='text/plain; version=0.0.4'))
+        metrics.add_collector(self.collect)
+
+    def warm_up(self):
+        t = time.perf_counter()
+        def step(name):
+            nonlocal t
+            now = time.perf_counter()
+            self.warm[name], t = round(now - t, 3), now
+
+        # ✅ Clients
+        key, secret = self.key, self.secret
+        if self.testnet_gateway is None:
+            self.testnet_gateway = Gateway(make_client(key, secret, testnet=True), 'testnet', WeightBudget(self.weight_per_minute))
+            self.client_testnet = metrics.instrument_client(self.testnet_gateway.client, 'testnet')
+        if self.live_gateway is None:
+            self.weight_budget = WeightBudget(self.weight_per_minute)   # live market data; the testnet has its own IP limits
+            self.live_gateway = Gateway(make_client(key, secret), 'live', self.weight_budget)
+            self.client_live = metrics.instrument_client(self.live_gateway.client, 'live')
+        step('clients')
+        for sym in self.strategy:
+            try: self.client_testnet.futures_change_leverage(symbol=sym, leverage=10)
+            except Exception: metrics.error('change_leverage')
+        step('leverage')
+
+        # 📩 Reporting
+        if self.notifier is None: self.notifier = TelegramNotifier(os.getenv("TELEGRAM_BOT_TOKEN"), os.getenv("TELEGRAM_CHAT_ID"))
+        if self.sheet_logger is None:
+            self.sheet_logger = SheetLogger(os.getenv("GSHEET_ID"), os.getenv("GOOGLE_CREDENTIALS"),
+                                            spool_path=os.getenv("SHEET_SPOOL", "sheet_spool.jsonl"))
+        if self.rollups is None: self.rollups = Rollups(os.getenv("PNL_ROLLUPS", "pnl_rollups.jsonl"))   # finished hours/days, one JSON line each
+
+        # ✅ Market data
+        archive = os.getenv("CANDLE_ARCHIVE")                           # warm-start history from `python archive.py sync`
+        if archive: from archive import CandleArchive
+        if self.kline_cache is None:
+            self.kline_cache = KlineCache(self.client_live, archive=CandleArchive(archive) if archive else None)
+            self.indicator_feed = IndicatorFeed()
+            self.kline_cache.add_listener(self.indicator_feed.on_kline)
+        stream = os.getenv("STREAM_MODE") == "1"
+        # ORDER_BOOK=1 (stream mode): local books from the depth stream for top of book, depth and imbalance
+        if self.books is None and stream and os.getenv("ORDER_BOOK") == "1": self.books = LocalBooks(self.client_live, list(self.strategy))
+        if self.market_stream is None and stream:
+            self.market_stream = MarketStream(key, secret, list(self.strategy), self.intervals, self.kline_cache, books=self.books)
+        if self.aio_runner is None and os.getenv("ASYNC_LOOP") == "1": self.aio_runner = aio.AsyncRunner()
+        for sym, strat in self.strategy.items():
+            for i in strat.intervals:
+                try: self.kline_cache.sync(sym, i)
+                except Exception: metrics.error('warm_klines')
+        step('market_data')
+
+        # ✅ State
+        self.states = {sym: SymbolState(sym, s.symbols[sym], OrderTracker(self.client_testnet, sym)) for sym, s in self.strategy.items()}
+        try:   # weight 1: every symbol's price tick, so stops and SL/TP are valid order prices
+            ticks = {s['symbol']: float(f['tickSize']) for s in self.client_testnet.futures_exchange_info()['symbols']
+                     for f in s['filters'] if f['filterType'] == 'PRICE_FILTER'}
+            for sym, st in self.states.items(): st.tick_size = ticks.get(sym, st.tick_size)
+        except Exception: metrics.error('exchange_info')
+        self.pending_orders = PendingOrders(self.client_testnet, PENDING_TTL)
+        self.exit_orders = ExitOrders(self.client_testnet) if os.getenv("EXCHANGE_EXITS") == "1" else None
+        if self.journal is None: self.journal = StateJournal(os.getenv("STATE_JOURNAL", "state_journal.jsonl"))
+        for sym, saved in self.journal.load().items():
+            if sym in self.states: self.states[sym].restore(saved)
+        for st in self.states.values(): self.roll_day(st)   # journaled on an earlier day: close that day out first
+        step('state')
+
+    def readiness(self):
+        # 200 once clients, candles and state are warm and the loops run; 503 (with progress) until then
+        body = {'ready': self.ready.is_set(), 'uptime': round(time.time() - self.started, 1), 'warm_up': self.warm}
+        return jsonify(body), 200 if self.ready.is_set() else 503
+
+    @metrics.timed('send_telegram')
+    def send_telegram(self, msg):
+        self.notifier.send(msg)
+
+    @metrics.timed('log_trade_to_sheet')
+    def log_trade_to_sheet(self, row):
+        self.sheet_logger.log(row)
+
+    # 📊 Data
+    @metrics.timed('get_klines')
+    def get_klines(self, symbol, interval='5m', limit=100):
+        import pandas as pd   # research/bench path only; the live loop never needs pandas
+        df = pd.DataFrame(self.kline_cache.get(symbol, interval, limit), columns=KLINE_COLUMNS)
+        df['time'] = pd.to_datetime(df['open_time'], unit='ms')
+        return df
+
+    @metrics.timed('get_candle')
+    def get_candle(self, symbol, interval):
+        # Last candle + streaming RSI/BB/ATR, kept current by the kline cache (no pandas)
+        self.kline_cache.sync(symbol, interval)
+        return self.indicator_feed.latest(symbol, interval)
+
+    def get_prices(self, symbols):
+        # One ticker call per pass: single-symbol weight 1, all-symbols weight 2
+        if not symbols: return {}
+        if len(symbols) == 1:
+            return {symbols[0]: float(self.client_live.futures_symbol_ticker(symbol=symbols[0])['price'])}
+        return {t['symbol']: float(t['price']) for t in self.client_live.futures_symbol_ticker()}
+
+    def get_top_of_book(self, symbol):
+        # Local order book, else streamed bookTicker when connected, else REST bookTicker (weight 2 instead of 10 for the order book)
+        top = self.books.top(symbol) if self.books else None
+        if top: return top
+        ms = self.market_stream
+        if ms and symbol in ms.bid and symbol in ms.ask: return ms.bid[symbol], ms.ask[symbol]
+        t = self.client_live.futures_orderbook_ticker(symbol=symbol)
+        return float(t['bidPrice']), float(t['askPrice'])
+
+    def market_snapshot(self, st):
+        return MarketSnapshot(st.symbol, self.get_candle, self.get_top_of_book, self.books.get if self.books else None)
+
+    def streamed_top(self, symbol):
+        # top of book already held locally (order book or bookTicker stream): no REST call to prefetch
+        ms = self.market_stream
+        return bool(self.books and self.books.top(symbol)) or bool(ms and symbol in ms.bid and symbol in ms.ask)
+
+    def wants_signal(self, st):
+        # flat, not done for the day (a new day resets target_hit in roll_day) and not in an SL-streak pause
+        if st.in_position or (st.target_hit and st.trading_day == trading_day()): return False
+        return not (st.last_loss_pause_time and datetime.utcnow() - st.last_loss_pause_time < LOSS_PAUSE)
+
+    def prefetch(self, sts, *extra):
+        # ASYNC_LOOP: snapshots of the symbols that may signal and the extra calls all in flight at once -> (snaps, extra results)
+        snaps = {st.symbol: self.market_snapshot(st) for st in sts if self.wants_signal(st)}
+        calls = [c for sym, snap in snaps.items()
+                 for c in aio.snapshot_calls(snap, self.strategy[sym].intervals, top=not self.streamed_top(sym))]
+        return snaps, self.aio_runner.gather(*extra, *calls)[:len(extra)]
+
+    # 📊 Signal
+    @metrics.timed('check_signal')
+    def check_signal(self, st, snap):
+        if st.target_hit: return None
+        if st.last_tp_hit_time and datetime.utcnow() - st.last_tp_hit_time < TP_COOLDOWN: return None
+        if (datetime.now(timezone.utc) + timedelta(hours=1)).minute >= 50: return None
+        return self.strategy[st.symbol].generate_signal(snap)
+
+    # 🛠 Entry
+    @metrics.timed('place_order')
+    def place_order(self, st, order_type, snap):
+        if st.target_hit or st.in_position: return
+        strat, side = self.strategy[st.symbol], 'buy' if 'buy' in order_type else 'sell'
+        bid, ask = snap.top()
+        buffer = strat.param(st.symbol, 'entry_buffer')
+        if ask - bid > strat.param(st.symbol, 'spread_threshold'):
+            if st.pending_order_id and st.pending_order_side != side and self.pending_orders.cancel(st):
+                self.send_telegram(f"⚠ *Canceled previous pending order* `{st.symbol}` (opposite signal)")
+            return
+        stop = st.round_price(ask + buffer if side == 'buy' else bid - buffer)
+        # a working stop is re-pointed (cancel-replace) rather than left to expire; small moves keep it
+        done = self.pending_orders.submit(st, side, stop, self.pending_orders.min_move(buffer, snap['5m']['atr']))
+        if done in (None, 'kept'): return
+        st.sl_price, st.tp_price = (st.round_price(p) for p in strat.stops(order_type, snap))
+        st.entry_signal = order_type
+        st.trade_direction = 'long' if side == 'buy' else 'short'
+
+        lines, notes = strat.describe(order_type, snap)
+        imb = snap.imbalance(strat.imbalance_bps)
+        if imb is not None: lines, notes = [*lines, f"*Book imbalance:* `{imb:+.2f}`"], [*notes, f"Imb:{imb:+.2f}"]
+        head, tag = ("🟩 *STOP ORDER PLACED*", "Pending") if done == 'placed' else ("🔁 *STOP ORDER AMENDED*", "Amended")
+        self.send_telegram("\n".join([f"{head} `{st.symbol}`", f"*Type:* `{order_type.upper()}`", f"*Price:* `{stop}`",
+                                      f"*SL:* `{st.sl_price}` | *TP:* `{st.tp_price}`", *lines, f"📍 Pending *({st.trade_direction})*"]))
+        self.log_trade_to_sheet([str(datetime.utcnow()), st.symbol, order_type, stop, st.sl_price, st.tp_price,
+                                 ",".join([f"{tag}({st.trade_direction})", *notes])])
+
+    # 🔄 Exits
+    @metrics.timed('manage_trade')
+    def manage_trade(self, st, price=None):
+        if price is None: price = self.get_prices([st.symbol])[st.symbol]
+        if not st.entry_price: return
+        long = st.trade_direction == 'long'
+        profit_pct = abs((price - st.entry_price) / st.entry_price)
+        if profit_pct >= 0.03: st.current_trail_percent = 0.015
+        elif profit_pct >= 0.02: st.current_trail_percent = 0.01
+        elif profit_pct >= 0.01: st.current_trail_percent = 0.005
+        elif not self.strategy[st.symbol].sticky_trail: st.current_trail_percent = 0.0
+
+        if st.exit_orders:   # exchange holds the SL/TP; only move the trailing order up a tier while in profit
+            if (price > st.entry_price) == long: self.exit_orders.trail(st, st.current_trail_percent)
+            return
+
+        if st.trailing_peak is None or (price > st.trailing_peak if long else price < st.trailing_peak):
+            st.trailing_peak = price
+            st.trailing_stop_price = st.trailing_peak * (1 - st.current_trail_percent if long else 1 + st.current_trail_percent)
+        if st.current_trail_percent > 0 and st.trailing_stop_price and (price <= st.trailing_stop_price if long else price >= st.trailing_stop_price):
+            self.close_position(st, price, f"Trailing Stop Hit ({st.current_trail_percent*100:.1f}%)")
+        elif st.tp_price and (price >= st.tp_price if long else price <= st.tp_price):
+            self.close_position(st, price, "Take Profit Hit")
+        elif st.sl_price and (price <= st.sl_price if long else price >= st.sl_price):
+            self.close_position(st, price, "Stop Loss Hit")
+
+    def close_position(self, st, exit_price, reason, market=True):
+        # market=False: an exchange-side exit already filled, only cancel its siblings and book the trade
+        strat = self.strategy[st.symbol]
+        if st.exit_orders: self.exit_orders.cancel(st)
+        if market:
+            side = 'SELL' if st.trade_direction == 'long' else 'BUY'
+            try: self.client_testnet.futures_create_order(symbol=st.symbol, side=side, type='MARKET', quantity=st.quantity)
+            except Exception: metrics.error('close_position')
+        pnl = round((exit_price - st.entry_price) if st.trade_direction == 'long' else (st.entry_price - exit_price), 2)
+        self.book_trade(st, pnl)
+
+        # 🆕 Track SL streak
+        if "Stop Loss" in reason:
+            st.recent_losses.append("SL")
+            if len(st.recent_losses) == st.recent_losses.maxlen and all(r == "SL" for r in st.recent_losses):
+                st.last_loss_pause_time = datetime.utcnow()
+                self.send_telegram(f"⏸ `{st.symbol}` pausing for 1 hour due to 4 consecutive Stop Losses.")
+        else:
+            st.recent_losses.clear()
+        if "Take Profit" in reason: st.last_tp_hit_time = datetime.utcnow()
+
+        if st.day_stats.pnl >= strat.param(st.symbol, 'daily_target') or st.day_stats.pnl <= strat.param(st.symbol, 'daily_loss_limit'): st.target_hit = True
+        self.send_telegram(f"❌ *Closed* `{st.symbol}` *at:* `{exit_price}`\n*Reason:* {reason}\n*PnL:* `{pnl}`")
+        self.log_trade_to_sheet([str(datetime.utcnow()), st.symbol, f"close({st.trade_direction})", st.entry_price, st.sl_price, st.tp_price, f"{reason},PnL:{pnl}"])
+        st.in_position, st.entry_price, st.entry_signal, st.entry_time = False, None, None, None
+
+    def book_trade(self, st, pnl):
+        # O(1) running stats for the day and the current hour; a finished hour goes to the rollups
+        hour = int(time.time() // 3600)
+        if st.hour_start != hour:
+            if st.hour_stats.trades: self.rollups.write('hour', st.hour_start * 3600, st.symbol, st.hour_stats)
+            st.hour_stats, st.hour_start = TradeStats(), hour
+        kind = 'trend' if 'trend' in (st.entry_signal or '') else 'reversal' if st.entry_signal else None
+        hold = (datetime.utcnow() - st.entry_time).total_seconds() if st.entry_time else 0.0
+        st.day_stats.add(pnl, kind, hold)
+        st.hour_stats.add(pnl, kind, hold)
+
+    def cancel_expired_order(self, st):
+        # ⏱ untriggered stop orders are canceled after an expiry scaled by the distance to the trigger in 5m ATRs
+        if not (st.pending_order_id and st.pending_order_time): return
+        age = (datetime.utcnow() - st.pending_order_time).total_seconds()
+        po = self.pending_orders
+        if age <= po.ttl / 4: return   # the shortest expiry there is; skip the price lookup
+        try:
+            price = (self.market_stream and self.market_stream.price(st.symbol)) or self.get_prices([st.symbol])[st.symbol]
+            distance = abs(st.pending_order_stop - price) if st.pending_order_stop else None
+            if age <= po.ttl_for(distance, self.get_candle(st.symbol, '5m')['atr']): return
+            if not po.cancel(st): return   # filled or gone: the tracker reports it
+            po.expired += 1
+            self.send_telegram(f"⌛ *Pending stop order canceled after {age / 60:.0f} minutes* `{st.symbol}`")
+        except Exception: metrics.error('cancel_expired_order')
+
+    # ♻️ Crash recovery
+    def recover(self):
+        # journaled state vs the exchange: adopt fills from downtime, drop vanished orders, never double-enter
+        for st in self.states.values():
+            if self.exit_orders is None: st.exit_orders.clear()
+            try: notes = reconcile(self.client_testnet, st)
+            except Exception as e: metrics.error('reconcile'); print(f"Reconcile failed ({st.symbol}):", e); continue
+            if self.exit_orders and st.in_position and not st.exit_orders: self.exit_orders.place(st)
+            if notes: self.send_telegram(f"♻️ *Recovered* `{st.symbol}`\n" + "\n".join(notes))
+            self.journal.record(st)
+
+    # 🚀 Bot loop
+    def wait_for_market(self):
+        # REST mode sleeps a full loop; stream mode wakes on the next market/user event. While an order
+        # is working, both also wake on the tracker's REST backoff: ('orders', ...) polls just those
+        # symbols (bot_loop turns it into a full pass once LOOP_INTERVAL is up)
+        waits = [st.order_tracker.next_poll_in() for st in self.states.values() if st.pending_order_id or st.exit_orders]
+        timeout = max(1.0, min([LOOP_INTERVAL] + waits))
+        if self.market_stream is None: time.sleep(timeout); event = None
+        else: event = self.market_stream.next_event(timeout)
+        return ('orders', None, None) if event is None and waits else event
+
+    def step(self, st, kind, price=None, snap=None):
+        self.roll_day(st)
+        if st.last_loss_pause_time:
+            if datetime.utcnow() - st.last_loss_pause_time < LOSS_PAUSE: return
+            st.last_loss_pause_time = None
+
+        if not st.in_position:
+            if st.pending_order_id and kind in (None, 'user', 'orders', 'resync'):
+                order = st.order_tracker.get(st.pending_order_id, use_rest=kind != 'user')
+                if order and order['status'] == 'FILLED':
+                    st.entry_price = float(order.get('avgPrice') or 0) or float(order['stopPrice'])
+                    st.entry_time = datetime.utcnow()
+                    st.order_tracker.forget(st.pending_order_id)
+                    st.pending_order_id, st.pending_order_time = None, None   # before anything below can raise
+                    st.in_position, st.trailing_peak, st.trailing_stop_price, st.current_trail_percent = True, st.entry_price, None, 0.0
+                    self.send_telegram(f"✅ *STOP order triggered* `{st.symbol}`\n*Entry Price:* `{st.entry_price}`\n*Direction:* `{st.trade_direction}`")
+                    self.log_trade_to_sheet([str(datetime.utcnow()), st.symbol, f"Triggered({st.trade_direction})", st.entry_price, st.sl_price, st.tp_price, "Opened"])
+                    if self.exit_orders: self.exit_orders.place(st)
+                elif order and order['status'] in FINAL_STATUSES:
+                    # canceled/expired/rejected on the exchange side
+                    st.order_tracker.forget(st.pending_order_id)
+                    st.pending_order_id, st.pending_order_time = None, None
+                else:
+                    self.cancel_expired_order(st)
+            if not st.in_position and kind in (None, 'kline', 'resync'):
+                snap = snap or self.market_snapshot(st)
+                s = self.check_signal(st, snap)
+                if s and self.strategy[st.symbol].allow(s, snap): self.place_order(st, s, snap)
+        else:
+            if st.exit_orders and kind in (None, 'user', 'orders', 'resync'):
+                fill = self.exit_orders.filled(st, use_rest=kind != 'user')
+                if fill: return self.close_position(st, *fill, market=False)
+                if not st.exit_orders: self.send_telegram(f"⚠ *Exchange exits lost* `{st.symbol}`: managing SL/TP/trailing locally")
+            if kind in (None, 'price', 'resync'): self.manage_trade(st, price)
+
+    def run_step(self, st, kind, price=None, snap=None):
+        try: self.step(st, kind, price, snap)
+        except Exception as e: metrics.error('bot_loop'); print(f"Error in loop ({st.symbol}):", e)
+        self.journal.record(st)
+
+    def bot_loop(self):
+        states, order, event, last_pass = self.states, list(self.states), None, 0.0
+        while True:
+            t0 = time.perf_counter()
+            if event and event[0] == 'user' and event[1] in states: states[event[1]].order_tracker.on_user_event(event[2])
+            if event and time.time() - last_pass >= LOOP_INTERVAL: event = None   # periodic full REST pass
+            if event is None:
+                # full pass over every symbol; the start rotates so nobody always waits on the budget last
+                last_pass, order = time.time(), order[1:] + order[:1]
+                metrics.heartbeat('bot_full_pass')
+                held, snaps = [s for s in order if states[s].in_position], {}
+                if self.aio_runner: snaps, (prices,) = self.prefetch([states[s] for s in order], lambda: self.get_prices(held))
+                else:
+                    try: prices = self.get_prices(held)
+                    except Exception as e: prices = e
+                if isinstance(prices, Exception): metrics.error('get_prices'); print("Error fetching prices:", prices); prices = {}
+                for sym in order: self.run_step(states[sym], None, prices.get(sym), snaps.get(sym))
+            else:
+                kind, sym = event[0], event[1]
+                if kind == 'resync': targets = list(states.values())
+                elif kind == 'orders': targets = [st for st in states.values() if st.pending_order_id or st.exit_orders]
+                else: targets = [states[sym]] if sym in states else []
+                snaps = self.prefetch(targets)[0] if self.aio_runner and kind in ('kline', 'resync') else {}
+                for st in targets:
+                    self.run_step(st, kind, self.market_stream.price(st.symbol) if kind == 'price' else None, snaps.get(st.symbol))
+            metrics.observe('bot_loop_iteration_seconds', time.perf_counter() - t0)
+            metrics.heartbeat('bot_loop')
+            event = self.wait_for_market()
+
+    # 📊 Daily report
+    def roll_day(self, st):
+        # First pass on a new trading day (UTC+1), or a restart on one: report and roll up the day the
+        # state belongs to, then start today clean (stats, target/loss pause, untracked-position pause)
+        today = trading_day()
+        if st.trading_day == today: return
+        d, day, name = st.day_stats, st.trading_day, self.strategy[st.symbol].name
+        kinds = "\n".join(f"{k.title()}: {v[0]} trades, PnL {v[1]:.2f}" for k, v in sorted(d.by_kind.items()))
+        self.send_telegram(f"""📊 *Daily Summary* `{st.symbol}` ({name}) {day}
+Total Trades: {d.trades}
+Win Rate: {d.win_rate:.1f}%
+Total PnL: {d.pnl:.2f} ({d.pnl * st.quantity:.2f} quote)
+Biggest Win: {d.best}
+Biggest Loss: {d.worst}
+Max Drawdown: {d.max_drawdown:.2f}
+Profit Factor: {'∞' if not d.gross_loss else f'{d.profit_factor:.2f}'}
+Avg Hold: {d.avg_hold / 60:.0f} min{chr(10) + kinds if kinds else ''}
+{'🎯 Target hit ✅' if st.target_hit else '🎯 Target not reached ❌'}""")
+        if st.hour_stats.trades: self.rollups.write('hour', st.hour_start * 3600, st.symbol, st.hour_stats)
+        start = datetime.fromisoformat(day).replace(tzinfo=TRADING_TZ).timestamp()
+        self.rollups.write('day', int(start), st.symbol, d, strategy=name, target_hit=st.target_hit)
+        st.day_stats, st.hour_stats, st.hour_start = TradeStats(), TradeStats(), None
+        st.target_hit, st.trading_day = False, today
+        self.journal.record(st)
+
+    def collect(self):
+        # metrics collector, evaluated on scrape
+        if not self.ready.is_set(): return {'engine_ready': 0}
+        states, ex, aio_runner = self.states.values(), self.exit_orders, self.aio_runner
+        return {
+            'engine_ready': 1, **{f'warm_up_{k}_seconds': v for k, v in self.warm.items()},
+            'weight_budget_used_total': self.weight_budget.used, 'weight_budget_waited_seconds_total': round(self.weight_budget.waited, 3),
+            **{f'gateway_{k}_total': v for k, v in self.live_gateway.stats().items()},
+            **{f'async_{k}_total': v for k, v in (aio_runner.stats() if aio_runner else {}).items()},
+            'sheet_rows_flushed_total': self.sheet_logger.flushed, 'sheet_rows_failed_total': self.sheet_logger.failed,
+            'positions_open': sum(st.in_position for st in states),
+            'pnl_today': round(sum(st.day_stats.pnl * st.quantity for st in states), 2), 'trades_today': sum(st.day_stats.trades for st in states),
+            'orders_pending': sum(bool(st.pending_order_id) for st in states),
+            **{f'telegram_{k}': v for k, v in self.notifier.stats().items()},
+            **{f'exit_orders_{k}': v for k, v in (ex.stats() if ex else {}).items()},
+            **{f'pending_orders_{k}': v for k, v in self.pending_orders.stats().items()},
+            **{f'order_book_{k}': v for k, v in (self.books.stats() if self.books else {}).items()},
+            **{k: v for s in self.strategies for k, v in s.stats().items()}}
+
+    def start(self):
+        # warm-up (retried until the clients come up), crash recovery, then the loops
+        while True:
+            try: self.warm_up(); break
+            except Exception as e:
+                metrics.error('warm_up')
+                self.warm['error'] = str(e)
+                print("Warm-up failed, retrying in 10s:", e)
+                time.sleep(10)
+        self.warm.pop('error', None)
+        self.recover()
+        if self.market_stream: self.market_stream.start()
+        threading.Thread(target=self.bot_loop, daemon=True).start()
+        self.ready.set()
+        print(f"Ready in {time.time() - self.started:.1f}s: {self.warm}")
+
+    def run(self):
+        # Flask binds first; everything that imports, dials or reads history happens behind it
+        port = int(os.environ.get("PORT", 5000))
+        threading.Thread(target=self.start, daemon=True).start()
+        self.app.run(host="0.0.0.0", port=port)
+
+def load_strategy(spec):
+    # "botTBA" or "botTBA=ETHUSDT,SOLUSDT:0.1" -> that module's STRATEGY on those symbols
+    module, _, symbols = spec.partition('=')
+    return importlib.import_module(module).STRATEGY(symbols or None)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2: sys.exit("usage: python engine.py botTB=BTCUSDT [botTBA=ETHUSDT,SOLUSDT:0.1 ...]")
+    Engine([load_strategy(spec) for spec in sys.argv[1:]]).run()
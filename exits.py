@@ -0,0 +1,87 @@
+# 🎯 Exchange-side exits
+# With EXCHANGE_EXITS=1 the SL and TP become reduce-only STOP_MARKET /
+# TAKE_PROFIT_MARKET orders placed as soon as the entry fills, and crossing a
+# 1/2/3% trail tier places (or cancel-replaces, since Binance cannot amend the
+# callback rate) a reduce-only TRAILING_STOP_MARKET. Exits then trigger at
+# exchange latency; the bot only reconciles the fill through the OrderTracker.
+# An exit order that ends any other way (canceled by hand, expired, a rejected
+# reduce-only) leaves the position unprotected: the rest are pulled and the
+# trade drops back to the bot's own trailing/SL/TP.
+from orders import FINAL_STATUSES
+
+EXIT_REASONS = {'STOP_MARKET': "Stop Loss Hit", 'TAKE_PROFIT_MARKET': "Take Profit Hit",
+                'TRAILING_STOP_MARKET': "Trailing Stop Hit"}
+
+class ExitOrders:
+    def __init__(self, client):
+        self.client = client
+        self.placed = self.replaced = self.failed = self.lost = 0
+
+    def _create(self, st, kind, **params):
+        side = 'SELL' if st.trade_direction == 'long' else 'BUY'
+        res = self.client.futures_create_order(symbol=st.symbol, side=side, type=kind, quantity=st.quantity,
+                                               reduceOnly='true', **params)
+        st.exit_orders[kind] = res['orderId']
+        st.order_tracker.track(res['orderId'])
+        self.placed += 1
+
+    def place(self, st):
+        # SL + TP right after the entry fill; False (nothing left open) if either fails, e.g. -2021
+        # when price already ran through the level or a dropped connection, so the loop keeps managing it
+        try:
+            self._create(st, 'STOP_MARKET', stopPrice=st.round_price(st.sl_price))
+            self._create(st, 'TAKE_PROFIT_MARKET', stopPrice=st.round_price(st.tp_price))
+            st.exit_trail_percent = 0.0
+            return True
+        except Exception as e:
+            print(f"Exchange exits rejected for {st.symbol}:", e)
+            self.failed += 1
+            self.cancel(st)
+            return False
+
+    def trail(self, st, percent):
+        # Moving up a tier: replace the trailing order with that tier's callback rate. If that fails
+        # the SL/TP are pulled too and the trade falls back to the bot's own trailing/SL/TP
+        if not st.exit_orders or percent <= st.exit_trail_percent: return
+        try:
+            old = st.exit_orders.pop('TRAILING_STOP_MARKET', None)
+            if old:
+                self._cancel(st, old)
+                self.replaced += 1
+            self._create(st, 'TRAILING_STOP_MARKET', callbackRate=round(percent * 100, 1))
+            st.exit_trail_percent = percent
+        except Exception as e:
+            print(f"Trailing exit rejected for {st.symbol}:", e)
+            self.failed += 1
+            self.cancel(st)
+
+    def filled(self, st, use_rest=True):
+        # (exit_price, reason) once one of the exit orders has filled, else None. Any other final
+        # status cancels the rest and clears st.exit_orders, so manage_trade takes over locally
+        done = {kind: o for kind, o in ((k, st.order_tracker.get(i, use_rest=use_rest)) for k, i in list(st.exit_orders.items()))
+                if o and o['status'] in FINAL_STATUSES}
+        for kind, o in done.items():
+            if o['status'] == 'FILLED':
+                reason = EXIT_REASONS[kind]
+                if kind == 'TRAILING_STOP_MARKET': reason += f" ({st.exit_trail_percent * 100:.1f}%)"
+                return float(o.get('avgPrice') or 0) or float(o['stopPrice']), reason
+        if done:
+            print(f"Exchange exits lost for {st.symbol}:", {k: o['status'] for k, o in done.items()})
+            self.lost += 1
+            self.cancel(st)
+        return None
+
+    def _cancel(self, st, order_id):
+        from binance.exceptions import BinanceAPIException   # python-binance is loaded by then; not at import
+        try: self.client.futures_cancel_order(symbol=st.symbol, orderId=order_id)
+        except BinanceAPIException: pass   # already filled/canceled
+        except Exception as e: print(f"Exit order {order_id} cancel failed ({st.symbol}):", e); self.failed += 1
+        st.order_tracker.forget(order_id)
+
+    def cancel(self, st):
+        for order_id in st.exit_orders.values(): self._cancel(st, order_id)
+        st.exit_orders.clear()
+        st.exit_trail_percent = 0.0
+
+    def stats(self):
+        return {'placed': self.placed, 'replaced': self.replaced, 'failed': self.failed, 'lost': self.lost}
@@ -0,0 +1,108 @@
+# 🚦 Binance REST gateway
+# Takes over a python-binance Client's _request so every REST call in the process:
+#  - reuses a pooled keep-alive session with a hard timeout
+#  - draws its endpoint's request weight from a WeightBudget before it goes out,
+#    and syncs the budget with X-MBX-USED-WEIGHT-1M after it comes back
+#  - on 429/418 pauses the whole budget for Retry-After instead of hammering on
+#  - retries idempotent reads (GET) on timeouts, 5xx and short bans with jittered backoff
+#  - coalesces concurrent identical public reads (klines, tickers) into one request
+# Orders (POST/DELETE) are never retried: a timeout there may still have executed.
+import random, threading, time
+import requests
+from requests.adapters import HTTPAdapter
+from ratelimit import klines_weight
+import metrics
+
+def depth_weight(limit):
+    return 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+
+# path -> weight(params); futures request weights from the Binance docs
+WEIGHTS = {
+    '/fapi/v1/klines': lambda p: klines_weight(int(p.get('limit', 500))),
+    '/fapi/v1/depth': lambda p: depth_weight(int(p.get('limit', 500))),
+    '/fapi/v1/ticker/price': lambda p: 1 if 'symbol' in p else 2,
+    '/fapi/v1/ticker/bookTicker': lambda p: 2 if 'symbol' in p else 5,
+    '/fapi/v1/openOrders': lambda p: 1 if 'symbol' in p else 40,
+    '/fapi/v2/positionRisk': lambda p: 5,
+    '/fapi/v2/account': lambda p: 5,
+}
+RETRY_STATUSES = (418, 429, 500, 502, 503, 504)
+
+def endpoint(uri):
+    return '/' + uri.split('?')[0].split('://', 1)[-1].split('/', 1)[-1]
+
+class Gateway:
+    def __init__(self, client, name, budget, timeout=10, pool=10, retries=3, backoff=0.5, max_ban_wait=60):
+        self.client, self.name, self.budget = client, name, budget
+        self.retries, self.backoff, self.max_ban_wait = retries, backoff, max_ban_wait
+        self.requests = self.retried = self.coalesced = self.throttled = 0
+        self._inflight, self._lock = {}, threading.Lock()
+        client.REQUEST_TIMEOUT = timeout
+        adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+        client.session.mount('https://', adapter)
+        client.session.mount('http://', adapter)
+        client._request = self._request
+
+    def _request(self, method, uri, signed, force_params=False, **kwargs):
+        if method != 'get' or signed: return self._call(method, uri, signed, force_params, kwargs)
+        key = (uri, tuple(sorted(kwargs.get('data', {}).items())))
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader: flight = self._inflight[key] = [threading.Event(), None, None]
+        if not leader:
+            # same public read already on the wire: wait for its answer instead of paying twice
+            self.coalesced += 1
+            metrics.inc('binance_gateway_coalesced_total', client=self.name)
+            flight[0].wait()
+            if flight[2]: raise flight[2]
+            return flight[1]
+        try:
+            flight[1] = self._call(method, uri, signed, force_params, kwargs)
+            return flight[1]
+        except Exception as e:
+            flight[2] = e
+            raise
+        finally:
+            with self._lock: self._inflight.pop(key, None)
+            flight[0].set()
+
+    def _call(self, method, uri, signed, force_params, kwargs):
+        path = endpoint(uri)
+        weight = WEIGHTS.get(path, lambda p: 1)(kwargs.get('data', {}))
+        for attempt in range(self.retries + 1):
+            self.budget.acquire(weight)
+            # _get_request_kwargs signs and flattens data in place; keep the original for retries
+            kw = dict(kwargs, data=dict(kwargs['data'])) if 'data' in kwargs else dict(kwargs)
+            try:
+                resp = getattr(self.client.session, method)(uri, **self.client._get_request_kwargs(method, signed, force_params, **kw))
+            except (requests.ConnectionError, requests.Timeout):
+                if method != 'get' or attempt == self.retries: raise
+                self._retry(path, attempt)
+                continue
+            self.client.response = resp
+            self.requests += 1
+            used = resp.headers.get('x-mbx-used-weight-1m')
+            if used: self.budget.sync(int(used))
+            if resp.status_code in (418, 429):
+                wait = float(resp.headers.get('Retry-After') or 60)
+                self.throttled += 1
+                metrics.inc('binance_gateway_throttled_total', client=self.name, status=resp.status_code)
+                print(f"Binance {resp.status_code} on {path}: backing off {wait:.0f}s")
+                self.budget.pause(wait)
+                if method != 'get' or attempt == self.retries or wait > self.max_ban_wait:
+                    return self.client._handle_response(resp)   # raises BinanceAPIException
+                continue   # budget.acquire sleeps out the ban
+            if resp.status_code in RETRY_STATUSES and method == 'get' and attempt < self.retries:
+                self._retry(path, attempt)
+                continue
+            return self.client._handle_response(resp)
+
+    def _retry(self, path, attempt):
+        self.retried += 1
+        metrics.inc('binance_gateway_retries_total', client=self.name, path=path)
+        time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def stats(self):
+        return {'requests': self.requests, 'retried': self.retried, 'coalesced': self.coalesced,
+                'throttled': self.throttled}
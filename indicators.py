@@ -0,0 +1,115 @@
+# 📈 Streaming indicators
+# O(1) per-candle Wilder RSI, Bollinger bands and Wilder ATR that reproduce
+# ta.momentum.rsi, ta.volatility.BollingerBands and ta.volatility.average_true_range
+# over the same candle series. The forming candle can be re-fed any number of
+# times: it is re-applied on top of the state left by the last closed candle.
+import math
+from collections import deque
+
+NAN = float('nan')
+RESYNC_EVERY = 512   # recompute the Bollinger sums from the window to stop float drift
+
+class StreamingIndicators:
+    def __init__(self, rsi_window=14, bb_window=20, bb_dev=2, atr_window=14):
+        self.rsi_window, self.bb_window, self.bb_dev, self.atr_window = rsi_window, bb_window, bb_dev, atr_window
+        self.last_time = None
+        self.closes = deque(maxlen=bb_window)
+        self._state = (0, NAN, 0.0, 0.0, 0.0, 0.0)   # n, close, avg_up, avg_dn, atr, tr_sum
+        self._prev = self._state                     # state before the last (possibly forming) candle
+        self._shift, self._sum, self._sumsq, self._updates = 0.0, 0.0, 0.0, 0
+
+    def _step(self, state, high, low, close):
+        n, prev_close, avg_up, avg_dn, atr, tr_sum = state
+        n += 1
+        if n == 1:
+            up = dn = 0.0
+            tr = high - low
+        else:
+            d = close - prev_close
+            up, dn = (d if d > 0 else 0.0), (-d if d < 0 else 0.0)
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        a = 1.0 / self.rsi_window
+        avg_up = up if n == 1 else avg_up + a * (up - avg_up)
+        avg_dn = dn if n == 1 else avg_dn + a * (dn - avg_dn)
+        w = self.atr_window
+        if n < w: tr_sum += tr
+        elif n == w: tr_sum += tr; atr = tr_sum / w
+        else: atr = (atr * (w - 1) + tr) / w
+        return (n, close, avg_up, avg_dn, atr, tr_sum)
+
+    def _push_close(self, close, replace):
+        if not self.closes: self._shift = close
+        x = close - self._shift
+        if replace:
+            old = self.closes[-1] - self._shift
+            self._sum += x - old; self._sumsq += x * x - old * old
+            self.closes[-1] = close
+        else:
+            if len(self.closes) == self.bb_window:
+                old = self.closes[0] - self._shift
+                self._sum -= old; self._sumsq -= old * old
+            self.closes.append(close)
+            self._sum += x; self._sumsq += x * x
+        self._updates += 1
+        if self._updates % RESYNC_EVERY == 0:
+            self._shift = self.closes[-1]
+            xs = [c - self._shift for c in self.closes]
+            self._sum, self._sumsq = sum(xs), sum(x * x for x in xs)
+
+    def update(self, open_time, high, low, close):
+        replace = open_time == self.last_time
+        if not replace:
+            self._prev = self._state
+            self.last_time = open_time
+        self._state = self._step(self._prev, high, low, close)
+        self._push_close(close, replace)
+
+    @property
+    def rsi(self):
+        n, _, avg_up, avg_dn, _, _ = self._state
+        if n < self.rsi_window: return NAN
+        return 100.0 if avg_dn == 0 else 100.0 - 100.0 / (1.0 + avg_up / avg_dn)
+
+    @property
+    def bands(self):
+        k = len(self.closes)
+        if k < self.bb_window: return NAN, NAN, NAN
+        m = self._sum / k
+        std = math.sqrt(max(self._sumsq / k - m * m, 0.0))
+        mid = m + self._shift
+        return mid, mid + self.bb_dev * std, mid - self.bb_dev * std
+
+    @property
+    def atr(self):
+        return self._state[4]
+
+    def values(self):
+        mid, high, low = self.bands
+        return {'rsi': self.rsi, 'bb_mid': mid, 'bb_high': high, 'bb_low': low, 'atr': self.atr}
+
+# 🔌 Kline-cache listener keeping one StreamingIndicators per (symbol, interval)
+class IndicatorFeed:
+    def __init__(self, **params):
+        self.params = params
+        self._ind, self._last, self._prev_volume = {}, {}, {}
+
+    def on_kline(self, symbol, interval, row):
+        key = (symbol, interval)
+        if row is None:   # store was (re)seeded
+            self._ind[key] = StreamingIndicators(**self.params)
+            self._last.pop(key, None); self._prev_volume.pop(key, None)
+            return
+        ind = self._ind.setdefault(key, StreamingIndicators(**self.params))
+        last = self._last.get(key)
+        if last is not None and row[0] != last[0]: self._prev_volume[key] = last[5]
+        ind.update(row[0], row[2], row[3], row[4])
+        self._last[key] = row
+
+    def latest(self, symbol, interval):
+        key = (symbol, interval)
+        row = self._last[key]
+        c = {'open_time': row[0], 'open': row[1], 'high': row[2], 'low': row[3], 'close': row[4],
+             'volume': row[5], 'close_time': row[6], 'taker_buy_base': row[9],
+             'prev_volume': self._prev_volume.get(key, 0.0)}
+        c.update(self._ind[key].values())
+        return c
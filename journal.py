@@ -0,0 +1,126 @@
+# 📓 Persistent state journal
+# Every time a symbol's state changes, its full state is appended to a JSONL
+# journal. The append is buffered: a writer thread flushes and fsyncs it every
+# sync_every seconds. Once compact_every records pile up, the latest state per
+# symbol is written atomically to <path>.snapshot and the journal restarts empty.
+# load() is snapshot + replay, last record per symbol wins, so a crash between
+# the two compaction steps just replays a few already-applied records.
+# reconcile() then checks the restored state against the exchange's open orders
+# and position before the loop starts trading again. Records are written after
+# the action, so an order placed just before a crash can be open on the exchange
+# without the state knowing it: reconcile cancels every such orphan (reduce-only
+# ones stay while they guard a position the state does not track).
+import atexit, json, os, threading, time
+from datetime import datetime
+
+class StateJournal:
+    def __init__(self, path='state_journal.jsonl', sync_every=1.0, compact_every=5000):
+        self.path, self.snapshot_path = path, path + '.snapshot'
+        self.sync_every, self.compact_every = sync_every, compact_every
+        self.records = self.syncs = 0
+        self._last, self._buf, self._since_compact = {}, [], 0
+        self._lock, self._io_lock = threading.Lock(), threading.Lock()
+        threading.Thread(target=self._run, daemon=True).start()
+        atexit.register(self.flush)
+
+    def load(self):
+        state, self._since_compact = {}, 0
+        try:
+            with open(self.snapshot_path) as f: state.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try: rec = json.loads(line)
+                    except ValueError: break   # torn tail write from a crash
+                    state[rec['s']] = rec['state']
+                    self._since_compact += 1
+        except OSError:
+            pass
+        self._last = {s: json.dumps(d, sort_keys=True) for s, d in state.items()}
+        return state
+
+    def record(self, st):
+        # Append st's state if it differs from the last one journaled for that symbol
+        d = st.to_dict()
+        key = json.dumps(d, sort_keys=True)
+        with self._lock:
+            if self._last.get(st.symbol) == key: return
+            self._last[st.symbol] = key
+            self._buf.append(json.dumps({'t': time.time(), 's': st.symbol, 'state': d}))
+            self.records += 1
+
+    def flush(self):
+        # file I/O under its own lock so record() never waits on an fsync
+        with self._io_lock:
+            with self._lock: lines, self._buf = self._buf, []
+            if not lines: return
+            with open(self.path, 'a') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush(); os.fsync(f.fileno())
+            self.syncs += 1
+            self._since_compact += len(lines)
+            if self._since_compact >= self.compact_every: self._compact()
+
+    def _compact(self):
+        with self._lock: latest = dict(self._last)
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write('{' + ','.join(f'{json.dumps(s)}:{d}' for s, d in latest.items()) + '}')
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        open(self.path, 'w').close()
+        self._since_compact = 0
+
+    def _run(self):
+        while True:
+            time.sleep(self.sync_every)
+            try: self.flush()
+            except OSError as e: print("Journal flush failed:", e)
+
+def reconcile(client, st):
+    # Align restored state with the exchange; returns human-readable notes of what changed
+    notes = []
+    open_orders = client.futures_get_open_orders(symbol=st.symbol)
+    open_ids = {o['orderId'] for o in open_orders}
+    pos = next((p for p in client.futures_position_information(symbol=st.symbol) if p['symbol'] == st.symbol), None)
+    amt = float(pos['positionAmt']) if pos else 0.0
+    if st.pending_order_id and st.pending_order_id not in open_ids:
+        if amt and not st.in_position:
+            # entry filled while we were down
+            st.in_position, st.entry_price = True, float(pos['entryPrice'])
+            st.entry_time = datetime.utcnow()   # hold time counts from the restart
+            st.trailing_peak, st.trailing_stop_price, st.current_trail_percent = st.entry_price, None, 0.0
+            notes.append(f"pending entry {st.pending_order_id} filled at {st.entry_price} during downtime")
+        else:
+            notes.append(f"pending entry {st.pending_order_id} no longer open")
+        st.pending_order_id, st.pending_order_time = None, None
+    if st.in_position and not amt:
+        if st.exit_orders:
+            # keep the ids: the first pass finds the filled exit and books it
+            notes.append("position closed by an exchange exit during downtime")
+        else:
+            notes.append("position was closed during downtime (PnL not booked)")
+            st.in_position, st.entry_price = False, None
+    elif st.in_position:
+        gone = [k for k, oid in st.exit_orders.items() if oid not in open_ids]
+        for k in gone: st.exit_orders.pop(k)
+        if gone: notes.append(f"exit orders gone: {', '.join(gone)}")
+    else:
+        st.exit_orders.clear()
+        if amt:
+            # never stack a new entry on a position this state knows nothing about
+            st.target_hit = True
+            notes.append(f"exchange shows an untracked position of {amt}; new entries paused for today")
+    known = {st.pending_order_id, *st.exit_orders.values()}
+    for o in open_orders:
+        if o['orderId'] in known or (amt and not st.in_position and o.get('reduceOnly')): continue
+        try: client.futures_cancel_order(symbol=st.symbol, orderId=o['orderId'])
+        except Exception as e:
+            notes.append(f"orphaned {o.get('type')} order {o['orderId']} could not be canceled: {e}")
+            continue
+        notes.append(f"canceled orphaned {o.get('type')} order {o['orderId']} (not in the journal)")
+    if st.pending_order_id: st.order_tracker.track(st.pending_order_id)
+    for oid in st.exit_orders.values(): st.order_tracker.track(oid)
+    return notes
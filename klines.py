@@ -0,0 +1,86 @@
+# 📦 Incremental kline cache
+# One in-memory candle store per (symbol, interval): seeded once with a full fetch,
+# then extended with only the candles from the last open_time onwards, so the
+# forming candle is replaced in place and closed candles are never re-downloaded.
+# With a CandleArchive the seed reads history from disk and fetches only the tail.
+import threading, time
+from collections import deque
+
+KLINE_COLUMNS = ['open_time','open','high','low','close','volume','close_time',
+                 'quote_asset_volume','number_of_trades','taker_buy_base','taker_buy_quote','ignore']
+FLOAT_FIELDS = (1, 2, 3, 4, 5, 9)   # open, high, low, close, volume, taker_buy_base
+INCREMENTAL_LIMIT = 99              # limit < 100 keeps futures_klines at request weight 1
+
+def parse_kline(k):
+    row = list(k)
+    for i in FLOAT_FIELDS: row[i] = float(row[i])
+    return row
+
+class KlineCache:
+    def __init__(self, client, maxlen=500, min_refresh=5.0, archive=None):
+        self.client, self.maxlen, self.min_refresh, self.archive = client, maxlen, min_refresh, archive
+        self._rows, self._synced = {}, {}
+        self._lock, self._key_locks = threading.Lock(), {}
+        self._listeners = []
+
+    def _lock_for(self, key):
+        # one lock per (symbol, interval) so symbols never wait on each other's fetches
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def add_listener(self, fn):
+        # fn(symbol, interval, row) for every new/updated candle, fn(symbol, interval, None) on (re)seed
+        self._listeners.append(fn)
+
+    def _fetch(self, **params):
+        return self.client.futures_klines(**params)
+
+    def _seed(self, symbol, interval, limit):
+        rows = self._rows[(symbol, interval)] = deque(maxlen=self.maxlen)
+        for fn in self._listeners: fn(symbol, interval, None)
+        history = self.archive.get(symbol, interval, max(limit, 100)) if self.archive else None
+        if history:
+            # warm start: local closed candles + one weight-1 fetch from the last of them
+            raw = self._fetch(symbol=symbol, interval=interval, startTime=history[-1][0], limit=INCREMENTAL_LIMIT)
+            if len(raw) < INCREMENTAL_LIMIT:
+                self._merge(symbol, interval, rows, history + raw)
+                return rows
+        raw = self._fetch(symbol=symbol, interval=interval, limit=max(limit, 100))
+        self._merge(symbol, interval, rows, raw)
+        return rows
+
+    def _merge(self, symbol, interval, rows, raw):
+        for k in raw:
+            row = parse_kline(k)
+            if rows and row[0] == rows[-1][0]: rows[-1] = row       # forming candle updated in place
+            elif not rows or row[0] > rows[-1][0]: rows.append(row)
+            else: continue
+            for fn in self._listeners: fn(symbol, interval, row)
+
+    def sync(self, symbol, interval, limit=100, force=False):
+        key = (symbol, interval)
+        with self._lock_for(key):
+            rows = self._rows.get(key)
+            if rows is None or len(rows) < limit:
+                rows = self._seed(symbol, interval, limit)
+            elif force or time.time() - self._synced.get(key, 0) >= self.min_refresh:
+                raw = self._fetch(symbol=symbol, interval=interval, startTime=rows[-1][0], limit=INCREMENTAL_LIMIT)
+                if len(raw) >= INCREMENTAL_LIMIT: rows = self._seed(symbol, interval, limit)   # gap too large, reseed
+                else: self._merge(symbol, interval, rows, raw)
+            else:
+                return rows
+            self._synced[key] = time.time()
+            return rows
+
+    def apply(self, symbol, interval, raw):
+        # Push candles received from elsewhere (e.g. a stream) into an already seeded store
+        with self._lock_for((symbol, interval)):
+            rows = self._rows.get((symbol, interval))
+            if rows is not None:
+                self._merge(symbol, interval, rows, raw)
+                self._synced[(symbol, interval)] = time.time()
+
+    def get(self, symbol, interval, limit=100):
+        rows = self.sync(symbol, interval, limit)
+        with self._lock_for((symbol, interval)):
+            return list(rows)[-limit:]
@@ -0,0 +1,107 @@
+# 📈 Lightweight metrics, served as Prometheus text from /metrics
+# Off unless METRICS=1. When off, timed() hands back the undecorated function and
+# every other call returns immediately, so the hot path pays one attribute check.
+#  - bot_call_seconds{call}: latency histograms of decorated bot functions
+#  - binance_request_seconds{client,path}: every REST call of an instrumented client,
+#    plus binance_used_weight{window} / binance_order_count{window} from the response headers
+#  - bot_errors_total{site}: exceptions the bot recovers from
+#  - *_age_seconds heartbeats (loop staleness) and collector callbacks evaluated on scrape
+import functools, os, threading, time
+
+ENABLED = os.getenv("METRICS") == "1"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_hist, _counters, _gauges, _beats, _collectors = {}, {}, {}, {}, []
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def observe(name, seconds, **labels):
+    if not ENABLED: return
+    with _lock:
+        h = _hist.get(_key(name, labels))
+        if h is None: h = _hist[_key(name, labels)] = [[0] * len(BUCKETS), 0.0, 0]
+        for i, b in enumerate(BUCKETS):
+            if seconds <= b:
+                h[0][i] += 1
+                break
+        h[1] += seconds
+        h[2] += 1
+
+def inc(name, n=1, **labels):
+    if not ENABLED: return
+    with _lock:
+        k = _key(name, labels)
+        _counters[k] = _counters.get(k, 0) + n
+
+def gauge(name, value, **labels):
+    if ENABLED: _gauges[_key(name, labels)] = value
+
+def error(site):
+    inc('bot_errors_total', site=site)
+
+def heartbeat(name):
+    # rendered as <name>_age_seconds: how long since the last beat
+    if ENABLED: _beats[name] = time.time()
+
+def add_collector(fn):
+    # fn() -> {name: value} read at scrape time (queue sizes, budget usage, ...)
+    _collectors.append(fn)
+
+def timed(call):
+    def wrap(fn):
+        if not ENABLED: return fn
+        @functools.wraps(fn)
+        def inner(*a, **kw):
+            t0 = time.perf_counter()
+            try: return fn(*a, **kw)
+            finally: observe('bot_call_seconds', time.perf_counter() - t0, call=call)
+        return inner
+    return wrap
+
+def instrument_client(client, name):
+    # Wrap python-binance's Client._request: per-path latency + the weight headers of every response
+    if not ENABLED: return client
+    request = client._request
+    def _request(method, uri, signed, force_params=False, **kwargs):
+        t0 = time.perf_counter()
+        try: return request(method, uri, signed, force_params, **kwargs)
+        finally:
+            observe('binance_request_seconds', time.perf_counter() - t0, client=name, path=uri.split('?')[0].split('.com', 1)[-1])
+            r = client.response
+            if r is not None:
+                for h, v in r.headers.items():
+                    h = h.lower()
+                    if h.startswith('x-mbx-used-weight-'): gauge('binance_used_weight', int(v), client=name, window=h[18:])
+                    elif h.startswith('x-mbx-order-count-'): gauge('binance_order_count', int(v), client=name, window=h[18:])
+    client._request = _request
+    return client
+
+def _fmt(name, labels, value):
+    lab = ','.join(f'{k}="{v}"' for k, v in labels)
+    return f"{name}{{{lab}}} {value}" if lab else f"{name} {value}"
+
+def render():
+    if not ENABLED: return "# metrics disabled (set METRICS=1)\n"
+    out, now = [], time.time()
+    with _lock:
+        hist = {k: (list(v[0]), v[1], v[2]) for k, v in _hist.items()}
+        counters, gauges = dict(_counters), dict(_gauges)
+    for (name, labels), (counts, total, n) in sorted(hist.items()):
+        acc = 0
+        for b, c in zip(BUCKETS, counts):
+            acc += c
+            out.append(_fmt(name + '_bucket', labels + (('le', b),), acc))
+        out.append(_fmt(name + '_bucket', labels + (('le', '+Inf'),), n))
+        out.append(_fmt(name + '_sum', labels, round(total, 6)))
+        out.append(_fmt(name + '_count', labels, n))
+    for (name, labels), v in sorted(counters.items()): out.append(_fmt(name, labels, v))
+    for (name, labels), v in sorted(gauges.items()): out.append(_fmt(name, labels, v))
+    for name, t in sorted(_beats.items()): out.append(_fmt(name + '_age_seconds', (), round(now - t, 3)))
+    for fn in _collectors:
+        try:
+            out.extend(_fmt(name, (), int(v) if isinstance(v, bool) else v) for name, v in fn().items() if v is not None)
+        except Exception:
+            inc('bot_errors_total', site='metrics_collector')
+    return '\n'.join(out) + '\n'
@@ -0,0 +1,66 @@
+# 📩 Background Telegram notifier
+# send() only enqueues, so order placement never waits on the Telegram API.
+# A worker thread posts through a pooled requests.Session with timeouts, merges
+# whatever piled up into one message, keeps >= min_interval between posts (Telegram
+# allows ~1 msg/s per chat) and honours 429 retry_after.
+import atexit, queue, threading, time
+import requests
+
+class TelegramNotifier:
+    def __init__(self, token, chat_id, maxsize=200, min_interval=1.0, max_len=4000, timeout=(3, 10), retries=3):
+        self.url = f"https://api.telegram.org/bot{token}/sendMessage"
+        self.chat_id, self.min_interval, self.max_len = chat_id, min_interval, max_len
+        self.timeout, self.retries = timeout, retries
+        self.session = requests.Session()
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.sent = self.dropped = self.failed = self.posts = 0
+        self._carry = None
+        self._last_post = 0.0
+        threading.Thread(target=self._run, daemon=True).start()
+        atexit.register(self.flush)
+
+    def send(self, msg):
+        try: self.queue.put_nowait(msg)
+        except queue.Full: self.dropped += 1
+
+    def stats(self):
+        return {'sent': self.sent, 'dropped': self.dropped, 'failed': self.failed,
+                'posts': self.posts, 'queued': self.queue.qsize()}
+
+    def flush(self, timeout=10):
+        # Block until everything queued so far has been posted (or given up on)
+        deadline = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+
+    def _run(self):
+        while True:
+            parts = [self._carry if self._carry is not None else self.queue.get()]
+            self._carry, size = None, len(parts[0])
+            while True:   # coalesce the burst that is already waiting
+                try: msg = self.queue.get_nowait()
+                except queue.Empty: break
+                if size + len(msg) + 2 > self.max_len:
+                    self._carry = msg
+                    break
+                parts.append(msg); size += len(msg) + 2
+            wait = self._last_post + self.min_interval - time.time()
+            if wait > 0: time.sleep(wait)
+            if self._post("\n\n".join(parts)): self.sent += len(parts)
+            else: self.failed += len(parts)
+            for _ in parts: self.queue.task_done()
+
+    def _post(self, text):
+        for _ in range(self.retries):
+            try:
+                r = self.session.post(self.url, data={"chat_id": self.chat_id, "text": text, "parse_mode": "Markdown"},
+                                      timeout=self.timeout)
+                self._last_post = time.time()
+                self.posts += 1
+                if r.status_code == 429:
+                    time.sleep(r.json().get('parameters', {}).get('retry_after', 1))
+                    continue
+                return r.ok
+            except Exception:
+                time.sleep(1)
+        return False
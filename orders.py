@@ -0,0 +1,54 @@
+# 🧾 Order-state tracker
+# Order status comes from ORDER_TRADE_UPDATE user-data events; REST
+# futures_get_order is only a reconciliation fallback, polled on a short
+# exponential backoff (2s, 4s, 8s ... max_backoff) per order while it is working.
+# Tracked orders stay cached until forget(); untracked ones are dropped once final.
+import time
+
+FINAL_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED')
+
+class OrderTracker:
+    def __init__(self, client, symbol, min_backoff=2, max_backoff=30):
+        self.client, self.symbol = client, symbol
+        self.min_backoff, self.max_backoff = min_backoff, max_backoff
+        self.orders = {}
+        self.events = self.polls = 0
+        self._delay, self._next_poll = {}, {}
+
+    def track(self, order_id):
+        self._delay[order_id] = self.min_backoff
+        self._next_poll[order_id] = time.time() + self.min_backoff
+
+    def on_user_event(self, msg):
+        if msg.get('e') != 'ORDER_TRADE_UPDATE': return
+        o = msg['o']
+        if o['s'] != self.symbol: return
+        self.events += 1
+        if o['X'] in FINAL_STATUSES and o['i'] not in self._delay:
+            # market/close orders and late cancel echoes of forgotten orders: nobody will get() them
+            self.orders.pop(o['i'], None)
+            return
+        self.orders[o['i']] = {'orderId': o['i'], 'status': o['X'], 'avgPrice': o['ap'], 'stopPrice': o['sp'],
+                               'side': o['S'], 'type': o['ot'], 'updateTime': msg['E']}
+
+    def next_poll_in(self):
+        if not self._next_poll: return float(self.max_backoff)
+        return max(0.0, min(self._next_poll.values()) - time.time())
+
+    def get(self, order_id, use_rest=True):
+        o = self.orders.get(order_id)
+        if o and o['status'] in FINAL_STATUSES: return o
+        if use_rest and time.time() >= self._next_poll.get(order_id, 0.0):
+            r = self.client.futures_get_order(symbol=self.symbol, orderId=order_id)
+            self.polls += 1
+            o = self.orders[order_id] = {'orderId': r['orderId'], 'status': r['status'], 'avgPrice': r.get('avgPrice'),
+                                         'stopPrice': r.get('stopPrice'), 'side': r.get('side'),
+                                         'type': r.get('origType', r.get('type')), 'updateTime': r.get('updateTime')}
+            delay = self._delay[order_id] = min(self._delay.get(order_id, self.min_backoff) * 2, self.max_backoff)
+            self._next_poll[order_id] = time.time() + delay
+        return o
+
+    def forget(self, order_id):
+        self.orders.pop(order_id, None)
+        self._delay.pop(order_id, None)
+        self._next_poll.pop(order_id, None)
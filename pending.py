@@ -0,0 +1,72 @@
+# ⏳ Working entry stops
+# One STOP_MARKET entry per symbol. A fresh signal while it is working re-points
+# it at the new stop (and side) instead of being ignored until the order expires
+# or canceling it and starting over. Binance futures can only modify LIMIT
+# orders (PUT /fapi/v1/order), so a stop is cancel-replaced back to back; when
+# the cancel reports the order unknown it has just filled or expired and nothing
+# is re-placed (the OrderTracker picks that up). Moves under min_move, and
+# repeats within min_interval, keep the order as it is.
+# Expiry adapts to the distance to the trigger in 5m ATRs: an order the market
+# is sitting on lives up to 2x ttl, one it ran away from as little as ttl/4.
+import time
+from datetime import datetime
+import metrics
+
+class PendingOrders:
+    def __init__(self, client, ttl=600, min_interval=30, atr_move=0.25):
+        self.client, self.ttl, self.min_interval, self.atr_move = client, ttl, min_interval, atr_move
+        self.placed = self.amended = self.kept = self.lost = self.expired = self.requests = 0
+        self.amend_seconds = 0.0
+
+    def _create(self, st, side, stop):
+        res = self.client.futures_create_order(symbol=st.symbol, side='BUY' if side == 'buy' else 'SELL',
+                                               type='STOP_MARKET', stopPrice=stop, quantity=st.quantity)
+        self.requests += 1
+        st.pending_order_id, st.pending_order_side, st.pending_order_stop = res['orderId'], side, stop
+        st.pending_order_time = datetime.utcnow()
+        st.order_tracker.track(st.pending_order_id)
+
+    def cancel(self, st):
+        # False when the order is no longer there to cancel (filled/expired): leave it to the tracker
+        from binance.exceptions import BinanceAPIException   # python-binance is loaded by then; not at import
+        self.requests += 1
+        try: self.client.futures_cancel_order(symbol=st.symbol, orderId=st.pending_order_id)
+        except BinanceAPIException as e:
+            if e.code == -2011: return False   # unknown order
+            raise
+        st.order_tracker.forget(st.pending_order_id)
+        st.pending_order_id, st.pending_order_time = None, None
+        return True
+
+    def min_move(self, entry_buffer, atr):
+        return max(entry_buffer, self.atr_move * atr) if atr == atr and atr else entry_buffer   # atr NaN while warming up
+
+    def submit(self, st, side, stop, min_move):
+        # -> 'placed' | 'amended' | 'kept' | None (the working order filled/expired under us)
+        if not st.pending_order_id:
+            self._create(st, side, stop)
+            self.placed += 1
+            return 'placed'
+        if side == st.pending_order_side and (abs(stop - (st.pending_order_stop or 0)) < min_move
+                                              or st.pending_order_time and (datetime.utcnow() - st.pending_order_time).total_seconds() < self.min_interval):
+            self.kept += 1
+            return 'kept'
+        t0 = time.perf_counter()
+        if not self.cancel(st):
+            self.lost += 1
+            return None
+        self._create(st, side, stop)
+        dt = time.perf_counter() - t0
+        self.amended += 1
+        self.amend_seconds += dt
+        metrics.observe('order_amend_seconds', dt)
+        return 'amended'
+
+    def ttl_for(self, distance, atr):
+        if not atr or atr != atr or distance is None: return self.ttl
+        return self.ttl * min(2.0, max(0.25, 0.5 * atr / max(distance, 1e-9)))
+
+    def stats(self):
+        return {'placed': self.placed, 'amended': self.amended, 'kept': self.kept, 'lost': self.lost,
+                'expired': self.expired, 'requests': self.requests,
+                'amend_seconds_avg': round(self.amend_seconds / self.amended, 4) if self.amended else 0.0}
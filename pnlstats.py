@@ -0,0 +1,71 @@
+# 📒 Running trade statistics
+# One TradeStats per symbol and period, updated in O(1) as each trade closes:
+# count, PnL, wins, best/worst, gross win/loss (profit factor), equity peak and
+# max drawdown, total hold time and a per signal kind (trend/reversal) split.
+# The daily target/loss check and the daily report read it instead of rescanning
+# a trade list. Rollups appends each finished hour/day as one JSON line.
+import json, threading
+
+class TradeStats:
+    def __init__(self):
+        self.trades = self.wins = 0
+        self.pnl = self.gross_win = self.gross_loss = self.best = self.worst = 0.0
+        self.peak = self.max_drawdown = self.hold_seconds = 0.0
+        self.by_kind = {}   # kind -> [trades, pnl, wins]
+
+    def add(self, pnl, kind=None, hold=0.0):
+        self.trades += 1
+        self.pnl += pnl
+        if pnl > 0: self.wins, self.gross_win, self.best = self.wins + 1, self.gross_win + pnl, max(self.best, pnl)
+        elif pnl < 0: self.gross_loss, self.worst = self.gross_loss - pnl, min(self.worst, pnl)
+        self.peak = max(self.peak, self.pnl)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.pnl)
+        self.hold_seconds += hold
+        if kind:
+            k = self.by_kind.setdefault(kind, [0, 0.0, 0])
+            k[0], k[1], k[2] = k[0] + 1, k[1] + pnl, k[2] + (pnl > 0)
+
+    @property
+    def win_rate(self):
+        return self.wins / self.trades * 100 if self.trades else 0.0
+
+    @property
+    def profit_factor(self):
+        return self.gross_win / self.gross_loss if self.gross_loss else float('inf') if self.gross_win else 0.0
+
+    @property
+    def avg_hold(self):
+        return self.hold_seconds / self.trades if self.trades else 0.0
+
+    def to_dict(self):
+        return dict(vars(self), by_kind={k: list(v) for k, v in self.by_kind.items()})
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls()
+        for k, v in (d or {}).items():
+            if hasattr(s, k): setattr(s, k, v)
+        s.by_kind = {k: list(v) for k, v in s.by_kind.items()}
+        return s
+
+    def summary(self):
+        # flat, rounded view for reports and rollups
+        return {'trades': self.trades, 'pnl': round(self.pnl, 2), 'win_rate': round(self.win_rate, 1),
+                'best': round(self.best, 2), 'worst': round(self.worst, 2), 'max_drawdown': round(self.max_drawdown, 2),
+                'profit_factor': round(self.profit_factor, 2) if self.gross_loss else None, 'avg_hold_s': round(self.avg_hold),
+                **{f'{k}_pnl': round(v[1], 2) for k, v in self.by_kind.items()},
+                **{f'{k}_trades': v[0] for k, v in self.by_kind.items()}}
+
+class Rollups:
+    def __init__(self, path='pnl_rollups.jsonl'):
+        self.path, self.written = path, 0
+        self._lock = threading.Lock()
+
+    def write(self, period, start, symbol, stats, **extra):
+        # period 'hour' | 'day', start = period start (epoch s)
+        line = json.dumps({'period': period, 'start': start, 'symbol': symbol, **extra, **stats.summary()})
+        try:
+            with self._lock, open(self.path, 'a') as f: f.write(line + '\n')
+            self.written += 1
+        except OSError as e:
+            print("Rollup write failed:", e)
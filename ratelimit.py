@@ -0,0 +1,47 @@
+# ⚖️ Shared Binance request-weight budget
+# Token bucket refilled at per_minute / 60 weight per second. Every REST caller in
+# the process draws from the same bucket, so adding symbols slows the fetch
+# cadence down instead of running into 429/418 bans.
+import threading, time
+
+def klines_weight(limit):
+    return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+
+class WeightBudget:
+    def __init__(self, per_minute=1200):
+        self.capacity, self.rate = float(per_minute), per_minute / 60.0
+        self.tokens, self.used, self.waited = float(per_minute), 0, 0.0
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def try_acquire(self, weight):
+        with self._lock:
+            self._refill()
+            if self.tokens < weight: return False
+            self.tokens -= weight
+            self.used += weight
+            return True
+
+    def acquire(self, weight):
+        while not self.try_acquire(weight):
+            with self._lock: wait = (weight - self.tokens) / self.rate
+            wait = max(wait, 0.01)
+            self.waited += wait
+            time.sleep(wait)
+
+    def sync(self, used):
+        # the server's X-MBX-USED-WEIGHT-1M is the truth: other processes on this IP spend it too
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, self.capacity - used)
+
+    def pause(self, seconds):
+        # 429/418 Retry-After: nobody gets tokens until the ban window has passed
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
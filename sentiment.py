@@ -0,0 +1,189 @@
+# 🧠 FinBERT news sentiment service
+# The model is loaded on a background thread, never at import. The same thread
+# polls the news feed every `refresh` seconds with ETag / If-Modified-Since, so an
+# unchanged feed costs one 304. Only headlines missing from the LRU (keyed by
+# headline hash) are scored, in one batch; score() just returns the cached
+# aggregate. `model` is any callable headlines -> (n, labels) probabilities,
+# which lets a stub stand in for FinBERT. `python sentiment.py --backend int8|onnx`
+# checks a faster backend's aggregate against the float model.
+import argparse, hashlib, os, sys, threading, time
+from collections import OrderedDict
+import numpy as np
+import requests
+
+FEED_URL = "https://news.google.com/rss/search?q=bitcoin+OR+crypto&hl=en-US&gl=US&ceid=US:en"
+MODEL_NAME = "yiyanghkust/finbert-tone"
+
+BACKENDS = ('torch', 'int8', 'onnx')
+SAMPLE_HEADLINES = [
+    "Bitcoin surges past record high as ETF inflows accelerate",
+    "Crypto lender files for bankruptcy after withdrawals frozen",
+    "Ethereum developers schedule next network upgrade",
+    "Regulators sue major exchange over unregistered securities",
+    "Bitcoin miners post record revenue as hash rate climbs",
+    "Stablecoin briefly loses its dollar peg amid market turmoil",
+    "Institutional investors increase crypto allocations, survey finds",
+    "Bitcoin slips as traders brace for interest rate decision",
+]
+
+def aggregate(probs):
+    # pos - neg, each averaged over headlines (columns 0 and 1 of the model output)
+    return float(probs[:, 0].mean() - probs[:, 1].mean()) if len(probs) else 0.0
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+def onnx_cache_path(name=MODEL_NAME, max_length=64):
+    # one exported graph per model and input length (the graph has max_length baked into its shapes)
+    return f"finbert-{name.replace('/', '_')}-{max_length}.onnx"
+
+def load_finbert(name=MODEL_NAME, backend='torch', max_length=64, threads=None, onnx_path=None):
+    # torch: float32 as before; int8: dynamic quantization of the Linear layers;
+    # onnx: graph exported once per model + max_length and run by ONNX Runtime; once the
+    # export exists, start-up loads neither torch nor the float model.
+    # int8/onnx fall back to torch when their runtime is not installed.
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    if backend == 'onnx':
+        try:
+            return _onnx_predict(name, tokenizer, onnx_path or onnx_cache_path(name, max_length), max_length, threads)
+        except ImportError as e:
+            print("ONNX backend unavailable, using torch:", e)
+    import torch
+    from transformers import AutoModelForSequenceClassification
+    if threads: torch.set_num_threads(threads)
+    model = AutoModelForSequenceClassification.from_pretrained(name).eval()
+    if backend == 'int8':
+        try:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        except (RuntimeError, AttributeError) as e:
+            print("int8 quantization unavailable, using torch:", e)
+
+    def predict(headlines):
+        inputs = tokenizer(headlines, return_tensors="pt", padding=True, truncation=True, max_length=max_length)
+        with torch.no_grad():
+            return torch.softmax(model(**inputs).logits, dim=1).numpy()
+    return predict
+
+def _export_onnx(name, tokenizer, path, max_length):
+    # the only step that needs torch and the float model; written under a temp name so a crash leaves no half graph
+    import torch
+    from transformers import AutoModelForSequenceClassification
+    model = AutoModelForSequenceClassification.from_pretrained(name).eval()
+    enc = tokenizer(["export"], return_tensors="pt", padding='max_length', truncation=True, max_length=max_length)
+    names = [n for n in ('input_ids', 'attention_mask', 'token_type_ids') if n in enc]   # forward() order
+    torch.onnx.export(model, tuple(enc[n] for n in names), path + '.tmp', input_names=names, output_names=['logits'],
+                      dynamic_axes={n: {0: 'batch'} for n in names + ['logits']}, opset_version=14)
+    os.replace(path + '.tmp', path)
+
+def _onnx_predict(name, tokenizer, path, max_length, threads):
+    import onnxruntime as ort
+    if not os.path.exists(path): _export_onnx(name, tokenizer, path, max_length)
+    opts = ort.SessionOptions()
+    if threads: opts.intra_op_num_threads = threads
+    session = ort.InferenceSession(path, opts, providers=['CPUExecutionProvider'])
+    names = [i.name for i in session.get_inputs()]
+
+    def predict(headlines):
+        enc = tokenizer(headlines, return_tensors="np", padding='max_length', truncation=True, max_length=max_length)
+        return _softmax(session.run(['logits'], {n: enc[n].astype(np.int64) for n in names})[0])
+    return predict
+
+class SentimentService:
+    def __init__(self, model=None, loader=load_finbert, url=FEED_URL, refresh=300, max_headlines=10,
+                 cache_size=1024, timeout=(3, 10), autostart=True):
+        self.model, self.loader, self.url, self.refresh = model, loader, url, refresh
+        self.max_headlines, self.cache_size, self.timeout = max_headlines, cache_size, timeout
+        self.session = requests.Session()
+        self.etag = self.modified = None
+        self.value, self.updated = 0.0, None
+        self.fetches = self.not_modified = self.scored = self.hits = self.errors = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        if autostart: threading.Thread(target=self._run, daemon=True).start()
+
+    def score(self):
+        # pos - neg averaged over the newest headlines; 0.0 until the first feed is scored
+        return self.value
+
+    def stats(self):
+        return {'value': self.value, 'updated': self.updated, 'fetches': self.fetches, 'not_modified': self.not_modified,
+                'scored': self.scored, 'cache_hits': self.hits, 'cached': len(self._cache), 'errors': self.errors,
+                'model_loaded': self.model is not None}
+
+    def _fetch(self):
+        headers = {}
+        if self.etag: headers['If-None-Match'] = self.etag
+        if self.modified: headers['If-Modified-Since'] = self.modified
+        r = self.session.get(self.url, headers=headers, timeout=self.timeout)
+        self.fetches += 1
+        if r.status_code == 304:
+            self.not_modified += 1
+            return None
+        r.raise_for_status()
+        self.etag, self.modified = r.headers.get('ETag'), r.headers.get('Last-Modified')
+        import feedparser
+        return [e.title for e in feedparser.parse(r.content).entries[:self.max_headlines]]
+
+    def update(self, headlines):
+        # Score what the LRU has not seen, then recompute the aggregate
+        keys = [hashlib.sha1(h.encode()).hexdigest() for h in headlines]
+        with self._lock:
+            fresh = list({k: h for k, h in zip(keys, headlines) if k not in self._cache}.items())
+        if fresh:
+            probs = np.asarray(self.model([h for _, h in fresh]), float)
+            self.scored += len(fresh)
+        with self._lock:
+            for i, (k, _) in enumerate(fresh):
+                self._cache[k] = (float(probs[i, 0]), float(probs[i, 1]))
+            for k in keys:
+                self._cache.move_to_end(k)
+            self.hits += len(keys) - len(fresh)
+            scores = np.array([self._cache[k] for k in keys]) if keys else None
+            while len(self._cache) > self.cache_size: self._cache.popitem(last=False)
+        self.value = aggregate(scores) if scores is not None else 0.0
+        self.updated = time.time()
+        return self.value
+
+    def refresh_now(self):
+        if self.model is None: self.model = self.loader()
+        headlines = self._fetch()
+        if headlines is not None: self.update(headlines)
+        return self.value
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh_now()
+            except Exception as e:
+                self.errors += 1
+                print("Sentiment refresh failed:", e)
+            time.sleep(self.refresh)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Compare a sentiment backend against the float torch model")
+    ap.add_argument('--backend', choices=BACKENDS[1:], default='int8')
+    ap.add_argument('--tol', type=float, default=0.05, help="max allowed |aggregate difference|")
+    ap.add_argument('--max-length', type=int, default=64)
+    ap.add_argument('--threads', type=int)
+    ap.add_argument('--offline', action='store_true', help="use the built-in sample headlines instead of the live feed")
+    args = ap.parse_args()
+
+    headlines = SAMPLE_HEADLINES
+    if not args.offline:
+        try: headlines = SentimentService(model=lambda h: h, autostart=False)._fetch() or SAMPLE_HEADLINES
+        except Exception as e: print("Feed unavailable, using sample headlines:", e)
+    results = {}
+    for backend in ('torch', args.backend):
+        t0 = time.time()
+        predict = load_finbert(backend=backend, max_length=args.max_length, threads=args.threads)
+        load = time.time() - t0
+        predict(headlines)   # warm-up
+        t0 = time.time()
+        for _ in range(5): probs = predict(headlines)
+        results[backend] = aggregate(probs)
+        print(f"{backend:>5}: score {results[backend]:+.4f}  load {load:.1f}s  infer {(time.time() - t0) / 5 * 1000:.0f}ms/{len(headlines)} headlines")
+    diff = abs(results['torch'] - results[args.backend])
+    print(f"|diff| = {diff:.4f} (tol {args.tol})")
+    sys.exit(0 if diff <= args.tol else 1)
@@ -0,0 +1,50 @@
+# 📸 Per-decision market snapshot
+# Built once when a symbol is evaluated and handed from check_signal to
+# place_order, so the order goes out on exactly the candles, indicators and
+# top of book the signal was taken on. Candles are pulled on first access per
+# interval and the top of book is only fetched once a signal needs it. Book
+# imbalance/depth come from the local order book (book.py) when one is kept.
+import time
+
+class MarketSnapshot:
+    def __init__(self, symbol, candle, top_of_book, book=None):
+        # candle(symbol, interval) -> latest candle dict; top_of_book(symbol) -> (bid, ask);
+        # book(symbol) -> synced book.OrderBook or None
+        self.symbol, self.time = symbol, time.time()
+        self._candle, self._top_of_book, self._book = candle, top_of_book, book
+        self._candles, self._top, self._depth = {}, None, {}
+
+    def __getitem__(self, interval):
+        c = self._candles.get(interval)
+        if c is None: c = self._candles[interval] = self._candle(self.symbol, interval)
+        return c
+
+    def top(self):
+        if self._top is None: self._top = self._top_of_book(self.symbol)
+        return self._top
+
+    @property
+    def bid(self): return self.top()[0]
+
+    @property
+    def ask(self): return self.top()[1]
+
+    @property
+    def spread(self): return self.ask - self.bid
+
+    def depth(self, bps=10):
+        # (bid qty, ask qty) within bps of mid, or None without a synced local book
+        if bps not in self._depth:
+            book = self._book(self.symbol) if self._book else None
+            self._depth[bps] = book.depth(bps) if book else None
+        return self._depth[bps]
+
+    def imbalance(self, bps=10):
+        # (bids - asks) / (bids + asks) within bps of mid, in [-1, 1]
+        d = self.depth(bps)
+        return (d[0] - d[1]) / (d[0] + d[1]) if d and sum(d) else None
+
+    def buy_ratio(self, interval):
+        # taker-buy share of the candle volume
+        c = self[interval]
+        return c['taker_buy_base'] / c['volume'] if c['volume'] > 0 else 0.0
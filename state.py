@@ -0,0 +1,67 @@
+# 🗂 Per-symbol strategy state
+# Everything the bots used to keep in module globals, one object per traded symbol.
+# to_dict()/restore() give the JSON form the state journal persists.
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from pnlstats import TradeStats
+
+PERSISTED = ('in_position', 'pending_order_id', 'pending_order_side', 'pending_order_time', 'pending_order_stop',
+             'entry_price', 'sl_price', 'tp_price', 'trailing_peak', 'trailing_stop_price', 'current_trail_percent', 'trade_direction',
+             'entry_signal', 'entry_time', 'hour_start', 'target_hit', 'last_tp_hit_time', 'recent_losses', 'last_loss_pause_time',
+             'exit_orders', 'exit_trail_percent', 'trading_day')
+TIMES = ('pending_order_time', 'entry_time', 'last_tp_hit_time', 'last_loss_pause_time')
+STATS = ('day_stats', 'hour_stats')
+
+TRADING_TZ = timezone(timedelta(hours=1))   # the daily target, stats and report run on UTC+1 days
+
+def trading_day():
+    return datetime.now(TRADING_TZ).date().isoformat()
+
+def round_to_tick(price, tick):
+    # nearest multiple of the symbol's PRICE_FILTER tickSize, without float noise in the order params
+    return round(round(price / tick) * tick, len(f"{tick:.10f}".rstrip('0').split('.')[1]))
+
+def parse_symbols(spec, default_quantity):
+    # "BTCUSDT,ETHUSDT:0.01" -> {'BTCUSDT': default_quantity, 'ETHUSDT': 0.01}
+    out = {}
+    for item in spec.split(','):
+        sym, _, qty = item.strip().upper().partition(':')
+        if sym: out[sym] = float(qty) if qty else default_quantity
+    return out
+
+class SymbolState:
+    def __init__(self, symbol, quantity, order_tracker):
+        self.symbol, self.quantity, self.order_tracker = symbol, quantity, order_tracker
+        self.in_position, self.pending_order_id, self.pending_order_side, self.pending_order_time = False, None, None, None
+        self.pending_order_stop = None
+        self.entry_price, self.sl_price, self.tp_price = None, None, None
+        self.trailing_peak, self.trailing_stop_price, self.current_trail_percent = None, None, 0.0
+        self.trade_direction, self.target_hit = None, False
+        self.entry_signal, self.entry_time = None, None          # order type and fill time of the open trade
+        self.day_stats, self.hour_stats, self.hour_start = TradeStats(), TradeStats(), None   # running PnL stats
+        self.trading_day = trading_day()       # day that day_stats / target_hit belong to (journals without it count as today)
+        self.last_tp_hit_time = None
+        self.recent_losses = deque(maxlen=4)   # recent SL streak
+        self.last_loss_pause_time = None       # pause timer after SL streak
+        self.exit_orders, self.exit_trail_percent = {}, 0.0   # exchange-side SL/TP/trailing order ids
+        self.tick_size = 0.01                  # price tick from exchangeInfo (set on warm-up, not persisted)
+
+    def round_price(self, price):
+        return round_to_tick(price, self.tick_size)
+
+    def to_dict(self):
+        d = {k: getattr(self, k) for k in PERSISTED}
+        for k in TIMES:
+            if d[k] is not None: d[k] = d[k].isoformat()
+        d['recent_losses'], d['exit_orders'] = list(d['recent_losses']), dict(d['exit_orders'])
+        for k in STATS: d[k] = getattr(self, k).to_dict()
+        return d
+
+    def restore(self, d):
+        for k in PERSISTED:
+            if k in d: setattr(self, k, d[k])
+        for k in TIMES:
+            if d.get(k): setattr(self, k, datetime.fromisoformat(d[k]))
+        for k in STATS: setattr(self, k, TradeStats.from_dict(d.get(k)))
+        self.recent_losses = deque(d.get('recent_losses', ()), maxlen=4)
+        self.exit_orders = dict(d.get('exit_orders') or {})
@@ -0,0 +1,76 @@
+# 🧩 Strategy plug-ins
+# A strategy only decides things: the candle intervals it reads, the entry signal
+# on a MarketSnapshot, optional filters, where SL/TP go and any extra detail for
+# the alerts. Data, orders, exits, state, journal and reporting belong to the
+# Engine, which can run several strategies (on disjoint symbols) over one set of
+# clients, kline cache and streams.
+# Price-unit settings (spread, entry buffer, TP offset, daily target/limit in
+# price points per unit) are in dollars of the symbol they were tuned on;
+# other symbols take their own from $SYMBOL_PARAMS, e.g.
+#   SYMBOL_PARAMS='{"SOLUSDT": {"entry_buffer": 0.02, "tp_offset": 1.5, "spread_threshold": 0.02}}'
+import json, os
+from state import parse_symbols
+
+PRICE_PARAMS = ('spread_threshold', 'entry_buffer', 'tp_offset', 'daily_target', 'daily_loss_limit')
+
+def band_stops(signal, snap, offset=100):
+    # SL at the 1h (trend) / 5m (reversal) candle open, TP `offset` past the 5m band the trade aims for
+    # (the engine rounds both to the symbol's tick)
+    c1h, c5 = snap['1h'], snap['5m']
+    sl = c1h['open'] if 'trend' in signal else c5['open']
+    target = c5['bb_mid'] if 'reversal' in signal else c5['bb_high'] if 'buy' in signal else c5['bb_low']
+    return sl, target + offset if 'buy' in signal else target - offset
+
+class Strategy:
+    name = 'strategy'
+    intervals = ('5m', '1h')    # what generate_signal / stops / describe read from the snapshot
+    quantity, spread_threshold, entry_buffer, tp_offset = 0.001, 0.5, 0.8, 100
+    daily_target, daily_loss_limit = 1200, -700
+    tuned_for = 'BTCUSDT'       # the symbol the price-unit settings above are in dollars of
+    symbol_params = {}          # symbol -> {PRICE_PARAMS name: value}, merged with $SYMBOL_PARAMS
+    sticky_trail = True         # under 1% profit keep the last trail tier; False drops back to no trail
+                                # (the tier follows profit down either way; only the exchange-side trail() ratchets)
+    filters = ()                # callables (signal, snap) -> bool that must all pass before an order goes out
+    min_imbalance = None        # e.g. 0.2: buys need a bid-heavy, sells an ask-heavy local book ($MIN_BOOK_IMBALANCE)
+    imbalance_bps = 10          # book depth window around mid for the imbalance
+
+    def __init__(self, symbols=None):
+        # "BTCUSDT,ETHUSDT:0.01"; defaults to $SYMBOLS
+        self.symbols = parse_symbols(symbols or os.getenv("SYMBOLS", "BTCUSDT"), self.quantity)
+        env = {sym.upper(): p for sym, p in json.loads(os.getenv("SYMBOL_PARAMS") or "{}").items()}
+        self.symbol_params = {sym: {**self.symbol_params.get(sym, {}), **env.get(sym, {})} for sym in {*self.symbol_params, *env}}
+        for sym, p in self.symbol_params.items():
+            unknown = set(p) - set(PRICE_PARAMS)
+            if unknown: raise ValueError(f"SYMBOL_PARAMS {sym}: unknown {sorted(unknown)}, expected {PRICE_PARAMS}")
+        for sym in self.symbols:
+            if sym != self.tuned_for and not self.symbol_params.get(sym):
+                print(f"⚠ {self.name}: {sym} trades on {self.tuned_for} price settings; set them in SYMBOL_PARAMS")
+        if os.getenv("MIN_BOOK_IMBALANCE"): self.min_imbalance = float(os.getenv("MIN_BOOK_IMBALANCE"))
+
+    def param(self, symbol, name):
+        # a PRICE_PARAMS setting for `symbol`: its override, else the class default
+        return self.symbol_params.get(symbol, {}).get(name, getattr(self, name))
+
+    def generate_signal(self, snap):
+        # 'trend_buy' | 'trend_sell' | 'reversal_buy' | 'reversal_sell' | None
+        raise NotImplementedError
+
+    def allow(self, signal, snap):
+        return self.book_gate(signal, snap) and all(f(signal, snap) for f in self.filters)
+
+    def book_gate(self, signal, snap):
+        # passes when off or without a synced local book (REST / bookTicker-only runs)
+        if self.min_imbalance is None: return True
+        imb = snap.imbalance(self.imbalance_bps)
+        if imb is None: return True
+        return imb >= self.min_imbalance if 'buy' in signal else imb <= -self.min_imbalance
+
+    def stops(self, signal, snap):
+        return band_stops(signal, snap, self.param(snap.symbol, 'tp_offset'))
+
+    def describe(self, signal, snap):
+        # extra Telegram lines and sheet note fields for a placed order
+        return [], []
+
+    def stats(self):
+        return {}
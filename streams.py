@@ -0,0 +1,145 @@
+# 🛰 Streaming market data
+# Futures kline + bookTicker + markPrice streams (live) for every traded symbol and
+# the user-data stream (testnet, where the orders live), turned into one event queue
+# of (kind, symbol, payload) for bot_loop. Price and kline ticks are coalesced per
+# symbol: at most one ('price', sym)/('kline', sym) event is queued at a time and
+# the consumer reads the latest price/candles when it handles it. With a
+# book.LocalBooks attached, the diff-depth streams feed the local order books too.
+# The watchdog reconnects the market streams when they go quiet for stale_after
+# and the user-data stream (listenKey) on an error or after user_stale_after of
+# silence, which is normal there; either way a 'resync' has the bot re-read its
+# orders over REST.
+import asyncio, queue, threading, time
+
+class MarketStream:
+    def __init__(self, api_key, api_secret, symbols, intervals, kline_cache, stale_after=30, books=None, user_stale_after=1800):
+        self.api_key, self.api_secret, self.books = api_key, api_secret, books
+        self.symbols, self.intervals, self.kline_cache = list(symbols), intervals, kline_cache
+        self.stale_after, self.user_stale_after = stale_after, user_stale_after
+        self.events = queue.Queue(maxsize=1000)
+        self.bid, self.ask, self.mark = {}, {}, {}
+        self.last_msg = self.last_user_msg = 0.0
+        self.reconnects = self.user_reconnects = 0
+        self._queued = set()
+        self._twm_live = self._twm_user = None
+        self._running = False
+
+    # ▶️ Lifecycle
+    def start(self):
+        self._running = True
+        self._connect()
+        threading.Thread(target=self._watchdog, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        for twm in (self._twm_live, self._twm_user):
+            if twm:
+                try: twm.stop()
+                except Exception: pass
+
+    def _connect(self):
+        streams = []
+        for s in (sym.lower() for sym in self.symbols):
+            streams += [f"{s}@kline_{i}" for i in self.intervals] + [f"{s}@bookTicker", f"{s}@markPrice@1s"]
+            if self.books: streams.append(f"{s}@depth@100ms")
+        self._twm_live = self._manager()
+        self._twm_live.start_futures_multiplex_socket(callback=self._on_market, streams=streams)
+        self._connect_user()
+        self.last_msg = time.time()
+
+    def _connect_user(self):
+        self._twm_user = self._manager(testnet=True)
+        self._twm_user.start_futures_user_socket(callback=self._on_user)
+        self.last_user_msg = time.time()
+
+    def _manager(self, **kw):
+        from binance import ThreadedWebsocketManager   # imported on start, not with the engine
+        asyncio.set_event_loop(asyncio.new_event_loop())   # each manager runs its own loop in its own thread
+        twm = ThreadedWebsocketManager(self.api_key, self.api_secret, **kw)
+        twm.start()
+        return twm
+
+    def _reconnect(self):
+        self.stop()
+        self._running = True
+        self.reconnects += 1
+        if self.books: self.books.reset()
+        self._connect()
+        self.backfill()
+
+    def _reconnect_user(self):
+        # market data is fine: only a new listenKey socket, then the bot re-reads its orders over REST
+        try: self._twm_user.stop()
+        except Exception: pass
+        self.user_reconnects += 1
+        self._connect_user()
+        self._push(('resync', None, None))
+
+    def backfill(self):
+        # Fill any candles missed while disconnected through the REST path
+        for sym in self.symbols:
+            for i in self.intervals:
+                try: self.kline_cache.sync(sym, i, force=True)
+                except Exception: pass
+        self._push(('resync', None, None))
+
+    def _watchdog(self):
+        while self._running:
+            time.sleep(5)
+            if not self._running: break
+            if time.time() - self.last_msg > self.stale_after:
+                try: self._reconnect()
+                except Exception: pass
+            elif time.time() - self.last_user_msg > self.user_stale_after:
+                try: self._reconnect_user()
+                except Exception: pass
+
+    # 📥 Callbacks (websocket threads)
+    def _push(self, event):
+        try: self.events.put_nowait(event)
+        except queue.Full: pass
+
+    def _push_once(self, kind, symbol):
+        if (kind, symbol) not in self._queued:
+            self._queued.add((kind, symbol))
+            self._push((kind, symbol, None))
+
+    def _on_market(self, msg):
+        self.last_msg = time.time()
+        if msg.get('e') == 'error':
+            self.last_msg = 0.0   # let the watchdog reconnect and backfill
+            return
+        data = msg.get('data', msg)
+        kind = data.get('e')
+        if kind == 'kline':
+            k, sym = data['k'], data['s']
+            self.kline_cache.apply(sym, k['i'], [[k['t'], k['o'], k['h'], k['l'], k['c'], k['v'], k['T'],
+                                                  k['q'], k['n'], k['V'], k['Q'], '0']])
+            self._push_once('kline', sym)
+        elif kind == 'bookTicker':
+            sym = data['s']
+            self.bid[sym], self.ask[sym] = float(data['b']), float(data['a'])
+            self._push_once('price', sym)
+        elif kind == 'depthUpdate':
+            if self.books: self.books.on_depth(data)
+        elif kind == 'markPriceUpdate':
+            self.mark[data['s']] = float(data['p'])
+
+    def _on_user(self, msg):
+        if msg.get('e') == 'error':
+            self.last_user_msg = 0.0   # listenKey expired / socket closed: the watchdog reconnects it
+            return
+        self.last_user_msg = time.time()
+        sym = msg['o']['s'] if msg.get('e') == 'ORDER_TRADE_UPDATE' else None
+        self._push(('user', sym, msg))
+
+    # 📤 Consumer side (bot_loop thread)
+    def price(self, symbol):
+        if symbol in self.bid and symbol in self.ask: return (self.bid[symbol] + self.ask[symbol]) / 2
+        return self.mark.get(symbol)
+
+    def next_event(self, timeout):
+        try: event = self.events.get(timeout=timeout)
+        except queue.Empty: return None
+        self._queued.discard(event[:2])
+        return event
@@ -0,0 +1,110 @@
+# 🧮 Parallel parameter sweep
+# Fans grid or random parameter sets for backtest.run across a ProcessPoolExecutor.
+# Candles + indicators are prepared once in the parent and placed in shared memory;
+# workers attach zero-copy NumPy views instead of receiving pickled arrays.
+# Results are written as one compressed .npz of columns, ranked by PnL then drawdown.
+import argparse, itertools, os, time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import backtest
+
+BASE_TIERS = ((0.03, 0.015), (0.02, 0.01), (0.01, 0.005))
+SWEEP_KEYS = ('rsi_lo', 'rsi_hi', 'entry_buffer', 'tp_offset', 'trail_levels', 'trail_widths',
+              'min_trend_volume', 'daily_target', 'daily_loss_limit')
+RESULT_COLUMNS = ('pnl', 'trades', 'win_rate', 'max_drawdown', 'profit_factor')
+
+_arrays, _blocks = None, []
+
+# 🧠 Shared memory
+def share(arrays):
+    spec = {}
+    for k, v in arrays.items():
+        v = np.ascontiguousarray(v)
+        shm = shared_memory.SharedMemory(create=True, size=max(v.nbytes, 1))
+        np.ndarray(v.shape, v.dtype, buffer=shm.buf)[:] = v
+        _blocks.append(shm)
+        spec[k] = (shm.name, v.shape, v.dtype.str)
+    return spec
+
+def release():
+    for shm in _blocks:
+        shm.close(); shm.unlink()
+    _blocks.clear()
+
+def _attach(spec):
+    global _arrays
+    _arrays = {}
+    for k, (name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _blocks.append(shm)   # keep the mapping alive for the life of the worker
+        _arrays[k] = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+
+# 🎛 Parameter sets
+def to_params(combo):
+    p = {k: v for k, v in combo.items() if k not in ('trail_levels', 'trail_widths')}
+    lv, wd = combo.get('trail_levels', 1.0), combo.get('trail_widths', 1.0)
+    p['trail_tiers'] = tuple((level * lv, width * wd) for level, width in BASE_TIERS)
+    return p
+
+def grid(space):
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+def sample(space, n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{k: vals[rng.integers(len(vals))] for k, vals in space.items()} for _ in range(n)]
+
+def _evaluate(job):
+    strategy, combos = job
+    out = []
+    for combo in combos:
+        s = backtest.summarize(backtest.run(_arrays, strategy, to_params(combo)))
+        out.append(tuple(s[c] for c in RESULT_COLUMNS))
+    return out
+
+def sweep(arrays, strategy, combos, workers=None, batch=8):
+    spec = share(arrays)
+    jobs = [(strategy, combos[i:i + batch]) for i in range(0, len(combos), batch)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(spec,)) as ex:
+            results = [r for chunk in ex.map(_evaluate, jobs) for r in chunk]
+    finally:
+        release()
+    cols = {c: np.array([r[i] for r in results], float) for i, c in enumerate(RESULT_COLUMNS)}
+    for k in combos[0] if combos else ():
+        cols[k] = np.array([np.nan if c[k] is None else c[k] for c in combos], float)
+    order = np.lexsort((cols['max_drawdown'], -cols['pnl']))
+    return {k: v[order] for k, v in cols.items()}
+
+def _parse_space(items):
+    space = {}
+    for item in items:
+        key, _, values = item.partition('=')
+        if key not in SWEEP_KEYS: raise SystemExit(f"unknown sweep key {key!r}, choose from {', '.join(SWEEP_KEYS)}")
+        space[key] = [None if v == 'none' else float(v) for v in values.split(',')]
+    return space
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Sweep backtest parameters in parallel")
+    ap.add_argument('paths', nargs='*', help="CSV files, globs or directories of 5m klines")
+    ap.add_argument('--archive', help="read 5m candles of --symbol from this candle archive instead")
+    ap.add_argument('--symbol', default='BTCUSDT')
+    ap.add_argument('--param', action='append', default=[], metavar='KEY=V1,V2,...',
+                    help=f"values to sweep; keys: {', '.join(SWEEP_KEYS)} (trail_* scale the 1/2/3%% tiers)")
+    ap.add_argument('--strategy', choices=sorted(backtest.PRESETS), default='tba')
+    ap.add_argument('--random', type=int, help="sample this many random combinations instead of the full grid")
+    ap.add_argument('--workers', type=int, default=os.cpu_count())
+    ap.add_argument('--out', default='sweep_results.npz')
+    args = ap.parse_args()
+
+    space = _parse_space(args.param)
+    combos = sample(space, args.random) if args.random else grid(space)
+    t0 = time.time()
+    candles = backtest.load_archive(args.archive, args.symbol) if args.archive else backtest.load_candles(args.paths)
+    arrays = backtest.prepare(candles)
+    res = sweep(arrays, args.strategy, combos, workers=args.workers)
+    np.savez_compressed(args.out, **res)
+    print(f"{len(combos)} combinations in {time.time() - t0:.1f}s -> {args.out}")
+    for i in range(min(10, len(combos))):
+        print("  ".join(f"{k}={res[k][i]:g}" for k in res))
@@ -0,0 +1,4 @@
+# Tests import the flat root modules (indicators, streams, sheets, ...) directly
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
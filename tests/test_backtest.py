@@ -0,0 +1,105 @@
+import numpy as np, pandas as pd
+import pytest
+import backtest
+from backtest import MIN5, REVERSAL_BUY
+
+def bars(closes, atr=1.0):
+    # one flat bar per close; hand-made indicator columns so run() only sees the signals given
+    c = np.array(closes, float)
+    n = len(c)
+    return {'time': np.arange(n, dtype=np.int64) * MIN5, 'open': c, 'high': c, 'low': c, 'close': c,
+            'open1h': c, 'mid5': c, 'hi5': c, 'lo5': c, 'atr5': np.full(n, atr)}
+
+def run(closes, at):
+    a = bars(closes)
+    sig = np.zeros(len(closes), np.int8)
+    sig[at] = REVERSAL_BUY
+    return backtest.run(a, 'tb', sig=sig), a['time']
+
+def test_later_signal_repoints_the_stop():
+    trades, t = run([100, 98, 98, 99, 99], [0, 2])
+    assert len(trades) == 1
+    assert trades['stop'][0] == 98.8 and trades['signal_time'][0] == t[2] + MIN5 and trades['entry_time'][0] == t[3]
+
+def test_small_move_keeps_the_stop():
+    trades, t = run([100, 100.1, 101, 101], [0, 1])
+    assert trades['stop'][0] == 100.8 and trades['signal_time'][0] == t[0] + MIN5
+
+def test_far_stop_expires_early_and_does_not_block_signals():
+    # 10.8 ATRs away: ttl/4, gone at the first bar close; the next signal places a fresh order
+    trades, t = run([100, 90, 90, 91, 91], [0, 2])
+    assert len(trades) == 1 and trades['signal_time'][0] == t[2] + MIN5 and trades['stop'][0] == 90.8
+
+def test_near_stop_outlives_the_base_ttl():
+    # 0.3 ATRs away: ~1000 s instead of 600, still working when price gets there at bar 4
+    trades, t = run([100, 100.5, 100.5, 100.5, 101, 101], [0])
+    assert len(trades) == 1 and trades['entry_time'][0] == t[4] and trades['stop'][0] == 100.8
+
+def test_atr_matches_ta():
+    ta = pytest.importorskip('ta')
+    rng = np.random.default_rng(3)
+    c = 100 + np.cumsum(rng.normal(0, 1, 300))
+    h, l = c + rng.uniform(0, 1, 300), c - rng.uniform(0, 1, 300)
+    a = backtest.prepare({'time': np.arange(300, dtype=np.int64) * MIN5, 'open': c, 'high': h, 'low': l, 'close': c,
+                          'volume': np.ones(300), 'taker_buy_base': np.ones(300)})
+    ref = ta.volatility.average_true_range(pd.Series(h), pd.Series(l), pd.Series(c), 14).to_numpy()
+    assert np.isnan(a['atr5'][:13]).all() and np.allclose(a['atr5'][13:], ref[13:])
+
+# 📊 Entry rules: the vectorized signals() against the live strategies' generate_signal
+def synthetic(n=720, seed=11):
+    import bench
+    rows = bench.synthetic_klines('5m', n=n, seed=seed)
+    cols = {'time': 0, 'open': 1, 'high': 2, 'low': 3, 'close': 4, 'volume': 5, 'taker_buy_base': 9}
+    return {k: np.array([float(r[j]) for r in rows], np.int64 if k == 'time' else float) for k, j in cols.items()}
+
+def live_snapshots(c5, start):
+    # what generate_signal sees at each 5m close: that candle, and the forming hour (closed hours + this close)
+    ta = pytest.importorskip('ta')
+    close, hid = pd.Series(c5['close']), c5['time'] // backtest.HOUR
+    rsi5 = ta.momentum.rsi(close, 14)
+    bb5 = ta.volatility.BollingerBands(close, 20, 2)
+    mid5, hi5, lo5 = bb5.bollinger_mavg(), bb5.bollinger_hband(), bb5.bollinger_lband()
+    hours = pd.DataFrame({'hid': hid, 'open': c5['open'], 'close': c5['close']}).groupby('hid').agg(open=('open', 'first'), close=('close', 'last'))
+    for i in range(start, len(close)):
+        closes = pd.concat([hours['close'][hours.index < hid[i]], pd.Series([close[i]])], ignore_index=True)
+        bb1 = ta.volatility.BollingerBands(closes, 20, 2)
+        yield i, {'5m': {'open': c5['open'][i], 'close': close[i], 'volume': c5['volume'][i], 'rsi': rsi5[i],
+                         'bb_mid': mid5[i], 'bb_high': hi5[i], 'bb_low': lo5[i]},
+                  '1h': {'open': hours['open'][hid[i]], 'close': close[i], 'rsi': ta.momentum.rsi(closes, 14).iloc[-1],
+                         'bb_high': bb1.bollinger_hband().iloc[-1], 'bb_low': bb1.bollinger_lband().iloc[-1]}}
+
+@pytest.mark.parametrize('preset, bot', [('tb', 'botTB'), ('tba', 'botTBA')])
+def test_signals_match_generate_signal(preset, bot):
+    import importlib
+    c5 = synthetic()
+    a = backtest.prepare(c5)
+    p = {**backtest.DEFAULTS, **backtest.PRESETS[preset], 'no_entry_minute': 60}   # the minute gate lives in check_signal
+    sig = backtest.signals(a, p)
+    strat = importlib.import_module(bot).STRATEGY('BTCUSDT')
+    names = {0: None, **backtest.SIGNAL_NAMES}
+    start = 21 * 12   # 20 closed hours for the 1h bands
+    live = {i: strat.generate_signal(snap) for i, snap in live_snapshots(c5, start)}
+    assert [names[int(s)] for s in sig[start:]] == [live[i] for i in range(start, len(sig))]
+    assert len({v for v in live.values() if v}) == 4   # every signal kind is exercised
+
+# 🔄 Exits: ticksim's kernel against exit_check, sticky (botTB/TBA) and not (botTBS)
+@pytest.mark.parametrize('sticky', [True, False])
+def test_exit_kernel_matches_exit_check(sticky):
+    import ticksim
+    rng = np.random.default_rng(5)
+    tiers = sorted(backtest.DEFAULTS['trail_tiers'], reverse=True)
+    for _ in range(40):
+        px = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, 3000)))
+        long = bool(rng.integers(2))
+        pos = [100.0, long, 96.0 if long else 104.0, 106.0 if long else 94.0, 100.0, None, 0.0]
+        ref = list(pos)
+        assert ticksim.scan(px, 0, pos, tiers, sticky) == ticksim.scan_reference(px, 0, ref, tiers, sticky)
+        assert pos[6] == ref[6]
+
+def test_non_sticky_trail_drops_back():
+    tiers = sorted(backtest.DEFAULTS['trail_tiers'], reverse=True)
+    for sticky, expected in ((True, 0.005), (False, 0.0)):
+        pos = [100.0, True, None, None, 100.0, None, 0.0]
+        backtest.exit_check(pos, 101.2, tiers, sticky)   # 1.2 %: first tier
+        backtest.exit_check(pos, 100.9, tiers, sticky)   # under 1 %
+        assert pos[6] == expected
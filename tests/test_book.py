@@ -0,0 +1,67 @@
+import types
+import pytest
+import book
+from book import OrderBook
+
+def diff(U, u, pu, bids=(), asks=()):
+    return {'e': 'depthUpdate', 's': 'BTCUSDT', 'U': U, 'u': u, 'pu': pu, 'b': list(bids), 'a': list(asks)}
+
+def snapshot(last):
+    return {'lastUpdateId': last, 'bids': [['100.0', '1'], ['99.0', '2']], 'asks': [['101.0', '1'], ['102.0', '3']]}
+
+def test_buffered_diffs_bridge_the_snapshot():
+    b = OrderBook('BTCUSDT')
+    b.on_diff(diff(1, 5, 0, bids=[['100.0', '9']]))        # older than the snapshot: dropped
+    b.on_diff(diff(6, 10, 5, bids=[['100.5', '1']]))       # spans lastUpdateId 8
+    b.on_diff(diff(11, 15, 10, asks=[['101.0', '0']]))
+    assert b.load(snapshot(8))
+    assert b.synced and b.last_id == 15
+    assert b.top() == (100.5, 102.0) and b.bid_qty[b.bid_px.index(100.0)] == 1.0
+
+def test_snapshot_newer_than_every_buffered_diff():
+    b = OrderBook('BTCUSDT')
+    b.on_diff(diff(1, 5, 0))
+    b.on_diff(diff(6, 7, 5))
+    assert b.load(snapshot(8))
+    assert b.on_diff(diff(3, 7, 2))                        # late stale diff: ignored
+    assert b.on_diff(diff(8, 12, 7, bids=[['100.5', '1']]))   # bridges 8 although pu != 8
+    assert b.on_diff(diff(13, 14, 12))
+    assert b.synced and b.last_id == 14 and b.top() == (100.5, 101.0)
+
+def test_first_live_diff_past_the_snapshot_is_a_gap():
+    b = OrderBook('BTCUSDT')
+    assert b.load(snapshot(8))
+    assert not b.on_diff(diff(10, 12, 9))
+    assert not b.synced and b.top() is None
+
+def test_buffered_gap_needs_a_new_snapshot():
+    b = OrderBook('BTCUSDT')
+    b.on_diff(diff(10, 12, 9))
+    assert not b.load(snapshot(8))                         # stream starts after the snapshot
+    b.on_diff(diff(6, 10, 5))
+    b.on_diff(diff(12, 15, 11))                            # pu 11 != 10: a diff was lost
+    assert not b.load(snapshot(8))
+
+def test_live_gap_unsyncs_and_keeps_the_diff():
+    b = OrderBook('BTCUSDT')
+    b.on_diff(diff(6, 10, 5))
+    assert b.load(snapshot(8))
+    assert b.on_diff(diff(11, 12, 10))
+    assert not b.on_diff(diff(14, 16, 13))
+    assert not b.synced and b._buffer == [diff(14, 16, 13)]
+
+def test_depth_and_imbalance():
+    b = OrderBook('BTCUSDT')
+    assert b.load(snapshot(8))
+    assert b.depth(bps=100) == (1.0, 1.0) and b.imbalance(bps=100) == 0.0
+    assert b.depth(bps=200) == (3.0, 4.0)
+
+def test_gap_queues_one_snapshot(monkeypatch):
+    monkeypatch.setattr(book.threading, 'Thread', lambda **kw: types.SimpleNamespace(start=lambda: None))
+    books = book.LocalBooks(None, ['BTCUSDT'])
+    books.on_depth(diff(6, 10, 5))
+    books.on_depth(diff(11, 12, 10))
+    assert books._resync.qsize() == 1 and books.gaps == 0
+    books.books['BTCUSDT'].load(snapshot(8))
+    books.on_depth(diff(20, 21, 19))
+    assert books.gaps == 1 and books.get('BTCUSDT') is None
@@ -0,0 +1,67 @@
+import types
+import pytest
+import engine
+
+class Stream:
+    def __init__(self, event=None):
+        self.event, self.timeouts = event, []
+
+    def next_event(self, timeout):
+        self.timeouts.append(timeout)
+        return self.event
+
+def bare_engine(stream=None, **st):
+    eng = engine.Engine.__new__(engine.Engine)
+    tracker = types.SimpleNamespace(next_poll_in=lambda: 4.0)
+    state = types.SimpleNamespace(symbol='BTCUSDT', pending_order_id=None, exit_orders={}, order_tracker=tracker)
+    state.__dict__.update(st)
+    eng.states, eng.market_stream = {'BTCUSDT': state}, stream
+    return eng
+
+def test_stream_idle_waits_a_full_loop():
+    eng = bare_engine(Stream())
+    assert eng.wait_for_market() is None
+    assert eng.market_stream.timeouts == [engine.LOOP_INTERVAL]
+
+@pytest.mark.parametrize('working', [{'pending_order_id': 7}, {'exit_orders': {'STOP_MARKET': 8}}])
+def test_stream_wakes_on_the_tracker_backoff(working):
+    eng = bare_engine(Stream(), **working)
+    assert eng.wait_for_market() == ('orders', None, None)
+    assert eng.market_stream.timeouts == [4.0]
+
+def test_stream_event_still_wins():
+    eng = bare_engine(Stream(('kline', 'BTCUSDT', None)), pending_order_id=7)
+    assert eng.wait_for_market() == ('kline', 'BTCUSDT', None)
+
+def test_rest_mode_sleeps_the_backoff(monkeypatch):
+    slept = []
+    monkeypatch.setattr(engine.time, 'sleep', slept.append)
+    assert bare_engine(pending_order_id=7).wait_for_market() == ('orders', None, None)
+    assert bare_engine().wait_for_market() is None
+    assert slept == [4.0, engine.LOOP_INTERVAL]
+
+def test_warm_up_retry_builds_each_component_once(monkeypatch, tmp_path):
+    import bench, botTB
+    fixture = bench.load_fixture(None)
+    monkeypatch.setattr(engine, 'make_client', lambda *a, **kw: bench.FakeClient(fixture))
+    for var, name in (('STATE_JOURNAL', 'j.jsonl'), ('PNL_ROLLUPS', 'r.jsonl'), ('SHEET_SPOOL', 's.jsonl')):
+        monkeypatch.setenv(var, str(tmp_path / name))
+    built = []
+    def counted(cls):
+        class Counted(cls):
+            def __init__(self, *a, **kw):
+                built.append(cls.__name__)
+                super().__init__(*a, **kw)
+        return Counted
+    for name in ('TelegramNotifier', 'SheetLogger', 'StateJournal', 'Gateway', 'KlineCache'):
+        monkeypatch.setattr(engine, name, counted(getattr(engine, name)))
+    load, failures = engine.StateJournal.load, [ConnectionError("journal volume not mounted yet")]
+    def flaky_load(self):
+        if failures: raise failures.pop()
+        return load(self)
+    monkeypatch.setattr(engine.StateJournal, 'load', flaky_load)
+    eng = engine.Engine([botTB.STRATEGY('BTCUSDT')])
+    with pytest.raises(ConnectionError): eng.warm_up()
+    eng.warm_up()
+    assert sorted(built) == ['Gateway', 'Gateway', 'KlineCache', 'SheetLogger', 'StateJournal', 'TelegramNotifier']
+    assert list(eng.states) == ['BTCUSDT'] and eng.states['BTCUSDT'].tick_size == 0.1
@@ -0,0 +1,53 @@
+import types
+import pytest
+from binance.exceptions import BinanceAPIException
+from exits import ExitOrders
+from orders import OrderTracker
+
+class Client:
+    # futures order endpoints over a dict of {orderId: status}
+    def __init__(self):
+        self.status, self.canceled, self.next_id = {}, [], 100
+
+    def futures_create_order(self, **kw):
+        self.next_id += 1
+        self.status[self.next_id] = 'NEW'
+        return {'orderId': self.next_id}
+
+    def futures_get_order(self, symbol, orderId):
+        return {'orderId': orderId, 'status': self.status[orderId], 'avgPrice': '0', 'stopPrice': '95', 'type': 'STOP_MARKET'}
+
+    def futures_cancel_order(self, symbol, orderId):
+        if self.status[orderId] != 'NEW':
+            raise BinanceAPIException(types.SimpleNamespace(status_code=400, text='{"code": -2011, "msg": "Unknown order sent."}'), 400, '{"code": -2011, "msg": "Unknown order sent."}')
+        self.status[orderId] = 'CANCELED'
+        self.canceled.append(orderId)
+
+@pytest.fixture
+def setup():
+    client = Client()
+    st = types.SimpleNamespace(symbol='BTCUSDT', trade_direction='long', quantity=0.01, sl_price=95.0, tp_price=110.0,
+                               exit_orders={}, exit_trail_percent=0.0, round_price=lambda p: round(p, 1), order_tracker=OrderTracker(client, 'BTCUSDT', min_backoff=0))
+    ex = ExitOrders(client)
+    assert ex.place(st)
+    return ex, st, client
+
+def test_fill_reports_exit(setup):
+    ex, st, client = setup
+    client.status[st.exit_orders['STOP_MARKET']] = 'FILLED'
+    client.status[st.exit_orders['TAKE_PROFIT_MARKET']] = 'EXPIRED'   # the exchange expires the reduce-only sibling
+    assert ex.filled(st) == (95.0, "Stop Loss Hit")
+    assert ex.lost == 0
+
+def test_working_orders_are_left_alone(setup):
+    ex, st, _ = setup
+    assert ex.filled(st) is None and len(st.exit_orders) == 2
+
+@pytest.mark.parametrize('status', ['CANCELED', 'EXPIRED', 'REJECTED'])
+def test_lost_exit_cancels_the_rest_and_falls_back(setup, status):
+    ex, st, client = setup
+    sl, tp = st.exit_orders['STOP_MARKET'], st.exit_orders['TAKE_PROFIT_MARKET']
+    client.status[sl] = status
+    assert ex.filled(st) is None
+    assert st.exit_orders == {} and ex.lost == 1 and client.canceled == [tp]
+    assert st.order_tracker.orders == {}
@@ -0,0 +1,130 @@
+import threading, time
+import pytest
+import requests
+import gateway
+from gateway import Gateway
+
+class Resp:
+    def __init__(self, status=200, body=None, headers=None):
+        self.status_code, self.body, self.headers = status, body, headers or {}
+
+class Session:
+    # replays a script of responses / exceptions; `gate` holds a call on the wire until set
+    def __init__(self, *script):
+        self.script, self.calls, self.gate, self.entered = list(script), [], None, threading.Event()
+
+    def mount(self, prefix, adapter): pass
+
+    def _send(self, method, uri, **kw):
+        self.calls.append((method, uri, kw.get('params')))
+        self.entered.set()
+        if self.gate: self.gate.wait(5)
+        out = self.script.pop(0)
+        if isinstance(out, Exception): raise out
+        return out
+
+    def get(self, uri, **kw): return self._send('get', uri, **kw)
+    def post(self, uri, **kw): return self._send('post', uri, **kw)
+
+class Client:
+    def __init__(self, session):
+        self.session, self.response = session, None
+
+    def _get_request_kwargs(self, method, signed, force_params=False, **kwargs):
+        return {'params': kwargs.pop('data', {})}
+
+    def _handle_response(self, resp):
+        if resp.status_code >= 400: raise RuntimeError(resp.status_code)
+        return resp.body
+
+class Budget:
+    def __init__(self):
+        self.acquired, self.synced, self.paused = [], [], []
+    def acquire(self, weight): self.acquired.append(weight)
+    def sync(self, used): self.synced.append(used)
+    def pause(self, seconds): self.paused.append(seconds)
+
+URI = 'https://fapi.binance.com/fapi/v1/klines'
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    slept = []
+    monkeypatch.setattr(gateway.time, 'sleep', slept.append)
+    return slept
+
+def make(*script, **kw):
+    session, budget = Session(*script), Budget()
+    return Gateway(Client(session), 'test', budget, **kw), session, budget
+
+def test_get_retries_timeouts_and_5xx(no_sleep):
+    gw, session, budget = make(requests.Timeout(), Resp(503), Resp(body=[1]))
+    assert gw._request('get', URI, False, data={'symbol': 'BTCUSDT', 'limit': 1000}) == [1]
+    assert len(session.calls) == 3 and gw.retried == 2 and len(no_sleep) == 2
+    assert budget.acquired == [5, 5, 5]   # every attempt pays its klines weight again
+    assert all(params == {'symbol': 'BTCUSDT', 'limit': 1000} for _, _, params in session.calls)
+
+def test_get_gives_up_after_retries():
+    gw, session, _ = make(Resp(502), Resp(502), retries=1)
+    with pytest.raises(RuntimeError):
+        gw._request('get', URI, False, data={})
+    assert len(session.calls) == 2
+
+def test_orders_are_never_retried():
+    gw, session, _ = make(requests.Timeout(), Resp(body={}))
+    with pytest.raises(requests.Timeout):
+        gw._request('post', 'https://fapi.binance.com/fapi/v1/order', True, data={'symbol': 'BTCUSDT'})
+    assert len(session.calls) == 1 and gw.retried == 0
+
+def test_429_pauses_budget_then_retries():
+    gw, session, budget = make(Resp(429, headers={'Retry-After': '3', 'x-mbx-used-weight-1m': '1200'}),
+                               Resp(body=[2], headers={'x-mbx-used-weight-1m': '5'}))
+    assert gw._request('get', URI, False, data={}) == [2]
+    assert budget.paused == [3.0] and budget.synced == [1200, 5]
+    assert gw.throttled == 1 and gw.retried == 0 and len(session.calls) == 2
+
+def test_long_ban_raises_instead_of_waiting():
+    gw, session, budget = make(Resp(418, headers={'Retry-After': '600'}), Resp(body=[]))
+    with pytest.raises(RuntimeError):
+        gw._request('get', URI, False, data={})
+    assert budget.paused == [600.0] and len(session.calls) == 1
+
+def test_429_on_order_is_not_retried():
+    gw, session, budget = make(Resp(429, headers={'Retry-After': '1'}), Resp(body={}))
+    with pytest.raises(RuntimeError):
+        gw._request('post', 'https://fapi.binance.com/fapi/v1/order', True, data={})
+    assert budget.paused == [1.0] and len(session.calls) == 1
+
+def test_concurrent_identical_reads_coalesce():
+    gw, session, _ = make(Resp(body=[3]))
+    session.gate = threading.Event()
+    results = []
+    call = lambda: results.append(gw._request('get', URI, False, data={'symbol': 'BTCUSDT', 'limit': 99}))
+    leader = threading.Thread(target=call)
+    leader.start()
+    assert session.entered.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    deadline = time.monotonic() + 5
+    while gw.coalesced == 0 and time.monotonic() < deadline: threading.Event().wait(0.001)
+    session.gate.set()
+    leader.join(5); follower.join(5)
+    assert results == [[3], [3]] and len(session.calls) == 1 and gw.coalesced == 1
+
+def test_coalesced_followers_share_the_error():
+    gw, session, _ = make(Resp(400))
+    session.gate = threading.Event()
+    errors = []
+    def call():
+        try: gw._request('get', URI, False, data={})
+        except RuntimeError as e: errors.append(e)
+    leader = threading.Thread(target=call)
+    leader.start()
+    assert session.entered.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    deadline = time.monotonic() + 5
+    while gw.coalesced == 0 and time.monotonic() < deadline: threading.Event().wait(0.001)
+    session.gate.set()
+    leader.join(5); follower.join(5)
+    assert len(errors) == 2 and len(session.calls) == 1
+    assert gw._inflight == {}
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+import ta
+import indicators
+from indicators import StreamingIndicators
+
+def candles(n=600, start=60000.0, seed=3):
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.r_[start, close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0007, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0007, n)))
+    return pd.DataFrame({'time': np.arange(n) * 300_000, 'open': open_, 'high': high, 'low': low, 'close': close})
+
+def reference(df):
+    bb = ta.volatility.BollingerBands(df['close'], 20, 2)
+    return pd.DataFrame({'rsi': ta.momentum.rsi(df['close'], 14), 'bb_mid': bb.bollinger_mavg(),
+                         'bb_high': bb.bollinger_hband(), 'bb_low': bb.bollinger_lband(),
+                         'atr': ta.volatility.average_true_range(df['high'], df['low'], df['close'], window=14)})
+
+def stream(df, partials=0):
+    # partials > 0: each candle is first fed as `partials` forming updates before its final values
+    ind, rows = StreamingIndicators(), []
+    rng = np.random.default_rng(11)
+    for t, o, h, l, c in df[['time', 'open', 'high', 'low', 'close']].itertuples(index=False):
+        for _ in range(partials):
+            x = rng.uniform(l, h)
+            ind.update(t, max(o, x), min(o, x), x)
+        ind.update(t, h, l, c)
+        rows.append(ind.values())
+    return pd.DataFrame(rows)
+
+def assert_matches(got, ref, start=20):
+    for col in ref:
+        np.testing.assert_allclose(got[col].to_numpy()[start:], ref[col].to_numpy()[start:], rtol=1e-9, atol=1e-7, err_msg=col)
+
+def test_matches_ta():
+    df = candles()
+    assert_matches(stream(df), reference(df))
+
+def test_refeeding_forming_candle():
+    df = candles(300)
+    assert_matches(stream(df, partials=3), reference(df))
+
+@pytest.mark.parametrize('every', [7, indicators.RESYNC_EVERY])
+def test_bollinger_resync(monkeypatch, every):
+    # long run at a high price level: the periodic resync must keep the running sums on ta's values
+    monkeypatch.setattr(indicators, 'RESYNC_EVERY', every)
+    df = candles(3 * indicators.RESYNC_EVERY + 37, start=1_000_000.0)
+    got, ref = stream(df, partials=1), reference(df)
+    assert_matches(got[['bb_mid', 'bb_high', 'bb_low']], ref[['bb_mid', 'bb_high', 'bb_low']])
+
+def test_warming_up():
+    ind = StreamingIndicators()
+    for i in range(13): ind.update(i, 101.0, 99.0, 100.0 + i % 3)
+    v = ind.values()
+    assert np.isnan(v['rsi']) and np.isnan(v['bb_mid'])
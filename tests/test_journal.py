@@ -0,0 +1,78 @@
+import pytest
+import journal
+from journal import StateJournal, reconcile
+from orders import OrderTracker
+from state import SymbolState
+
+class Client:
+    def __init__(self, orders=(), amt=0.0, entry=0.0):
+        self.orders = {o['orderId']: o for o in orders}
+        self.position = {'symbol': 'BTCUSDT', 'positionAmt': str(amt), 'entryPrice': str(entry)}
+        self.canceled = []
+
+    def futures_get_open_orders(self, symbol):
+        return list(self.orders.values())
+
+    def futures_position_information(self, symbol):
+        return [self.position]
+
+    def futures_cancel_order(self, symbol, orderId):
+        self.canceled.append(orderId)
+        del self.orders[orderId]
+
+def order(oid, kind='STOP_MARKET', reduce_only=False):
+    return {'orderId': oid, 'type': kind, 'reduceOnly': reduce_only}
+
+def state(client, **kw):
+    st = SymbolState('BTCUSDT', 0.001, OrderTracker(client, 'BTCUSDT'))
+    for k, v in kw.items(): setattr(st, k, v)
+    return st
+
+def test_orphaned_entry_is_canceled():
+    # the stop went out inside the fsync window before the crash: the journal still shows it flat
+    client = Client([order(11)])
+    st = state(client)
+    notes = reconcile(client, st)
+    assert client.canceled == [11] and not st.pending_order_id and not st.in_position
+    assert any('orphaned STOP_MARKET order 11' in n for n in notes)
+
+def test_known_orders_are_kept_and_tracked():
+    client = Client([order(11), order(12)])
+    st = state(client, pending_order_id=11)
+    reconcile(client, st)
+    assert client.canceled == [12] and st.pending_order_id == 11 and 11 in st.order_tracker._next_poll
+
+def test_orphaned_exits_canceled_in_position():
+    client = Client([order(21, reduce_only=True), order(22, 'TAKE_PROFIT_MARKET', True), order(23, 'TRAILING_STOP_MARKET', True)], amt=0.001, entry=100)
+    st = state(client, in_position=True, entry_price=100.0, exit_orders={'STOP_MARKET': 21, 'TAKE_PROFIT_MARKET': 22})
+    reconcile(client, st)
+    assert client.canceled == [23] and st.exit_orders == {'STOP_MARKET': 21, 'TAKE_PROFIT_MARKET': 22}
+
+def test_untracked_position_keeps_its_reduce_only_orders():
+    client = Client([order(31, reduce_only=True), order(32)], amt=0.002, entry=100)
+    st = state(client)
+    notes = reconcile(client, st)
+    assert client.canceled == [32] and st.target_hit and not st.in_position
+    assert any('untracked position' in n for n in notes)
+
+def test_entry_filled_during_downtime_is_adopted():
+    client = Client(amt=-0.001, entry=101.5)
+    st = state(client, pending_order_id=41, trade_direction='short')
+    reconcile(client, st)
+    assert st.in_position and st.entry_price == 101.5 and st.pending_order_id is None
+
+def test_journal_replays_the_last_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal.threading, 'Thread', lambda **kw: type('T', (), {'start': lambda self: None})())
+    monkeypatch.setattr(journal.atexit, 'register', lambda fn: None)
+    path = str(tmp_path / 'j.jsonl')
+    j = StateJournal(path, compact_every=3)
+    st = state(Client())
+    for stop in (100.0, 101.0, 102.0, 103.0):
+        st.pending_order_stop = stop
+        j.record(st)
+        j.record(st)   # unchanged: not appended again
+        j.flush()
+    assert j.records == 4
+    restored = state(Client())
+    restored.restore(StateJournal(path).load()['BTCUSDT'])
+    assert restored.pending_order_stop == 103.0
@@ -0,0 +1,12 @@
+import os, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_metrics_flag_read_from_dotenv(tmp_path):
+    # METRICS=1 only in .env: engine loads it before metrics reads the flag
+    (tmp_path / '.env').write_text("METRICS=1\n")
+    env = {k: v for k, v in os.environ.items() if k != 'METRICS'}
+    env['PYTHONPATH'] = ROOT
+    out = subprocess.run([sys.executable, '-c', 'import engine, metrics; print(metrics.ENABLED)'],
+                         cwd=tmp_path, env=env, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == 'True'
@@ -0,0 +1,71 @@
+import types
+import pytest
+import notify
+
+class Stop(Exception):
+    pass
+
+class Session:
+    # replays (status, json) responses, or raises the exceptions it is given
+    def __init__(self, *script):
+        self.script, self.texts = list(script), []
+
+    def post(self, url, data, timeout):
+        out = self.script.pop(0) if self.script else (200, {})
+        if isinstance(out, Exception): raise out
+        self.texts.append(data['text'])
+        return types.SimpleNamespace(status_code=out[0], ok=out[0] == 200, json=lambda: out[1])
+
+@pytest.fixture
+def make(monkeypatch):
+    # no worker thread / atexit hook: run_until_idle drives the _run loop itself
+    monkeypatch.setattr(notify.threading, 'Thread', lambda **kw: types.SimpleNamespace(start=lambda: None))
+    monkeypatch.setattr(notify.atexit, 'register', lambda fn: None)
+    sleeps = []
+    monkeypatch.setattr(notify.time, 'sleep', sleeps.append)
+    def make(*script, **kw):
+        n = notify.TelegramNotifier('token', 'chat', **kw)
+        n.session = Session(*script)
+        return n
+    make.sleeps = sleeps
+    return make
+
+def run_until_idle(n):
+    get = n.queue.get
+    def blocking_get(block=True, timeout=None):
+        if block and n.queue.empty(): raise Stop
+        return get(block, timeout)
+    n.queue.get = blocking_get
+    with pytest.raises(Stop): n._run()
+
+def test_burst_is_one_post(make):
+    n = make()
+    for msg in ('a', 'b', 'c'): n.send(msg)
+    run_until_idle(n)
+    assert n.session.texts == ['a\n\nb\n\nc']
+    assert n.stats() == {'sent': 3, 'dropped': 0, 'failed': 0, 'posts': 1, 'queued': 0}
+    assert n.queue.unfinished_tasks == 0
+
+def test_long_burst_splits_and_spaces_posts(make):
+    n = make(max_len=10, min_interval=1.0)
+    for msg in ('aaaa', 'bbbb', 'cccc'): n.send(msg)
+    run_until_idle(n)
+    assert n.session.texts == ['aaaa\n\nbbbb', 'cccc'] and n.sent == 3
+    assert len(make.sleeps) == 1 and 0 < make.sleeps[0] <= 1.0   # second post waits out min_interval
+
+def test_full_queue_drops(make):
+    n = make(maxsize=2)
+    for msg in ('a', 'b', 'c'): n.send(msg)
+    assert n.dropped == 1 and n.stats()['queued'] == 2
+
+def test_429_honours_retry_after(make):
+    n = make((429, {'parameters': {'retry_after': 7}}), (200, {}), min_interval=0)
+    n.send('a')
+    run_until_idle(n)
+    assert make.sleeps == [7] and n.posts == 2 and n.sent == 1 and n.failed == 0
+
+def test_unreachable_api_counts_failures(make):
+    n = make(ConnectionError(), ConnectionError(), retries=2)
+    n.send('a')
+    run_until_idle(n)
+    assert n.failed == 1 and n.sent == 0 and n.posts == 0 and n.queue.unfinished_tasks == 0
@@ -0,0 +1,56 @@
+import pytest
+from orders import OrderTracker
+
+class Client:
+    def __init__(self):
+        self.status, self.calls = {}, 0
+
+    def futures_get_order(self, symbol, orderId):
+        self.calls += 1
+        return {'orderId': orderId, 'status': self.status[orderId], 'avgPrice': '100', 'stopPrice': '99', 'type': 'STOP_MARKET'}
+
+def event(order_id, status, symbol='BTCUSDT', order_type='STOP_MARKET'):
+    return {'e': 'ORDER_TRADE_UPDATE', 'E': 1, 'o': {'i': order_id, 's': symbol, 'X': status, 'ap': '100.5',
+                                                     'sp': '99', 'S': 'BUY', 'ot': order_type}}
+
+@pytest.fixture
+def tracker():
+    return OrderTracker(Client(), 'BTCUSDT', min_backoff=0)
+
+def test_event_fill_needs_no_rest(tracker):
+    tracker.track(1)
+    tracker.on_user_event(event(1, 'NEW'))
+    assert tracker.get(1, use_rest=False)['status'] == 'NEW'
+    tracker.on_user_event(event(1, 'FILLED'))
+    o = tracker.get(1)
+    assert o['status'] == 'FILLED' and o['avgPrice'] == '100.5' and tracker.client.calls == 0
+    tracker.forget(1)
+    assert tracker.orders == {} and tracker._next_poll == {}
+
+def test_other_symbols_and_events_ignored(tracker):
+    tracker.on_user_event(event(1, 'NEW', symbol='ETHUSDT'))
+    tracker.on_user_event({'e': 'ACCOUNT_UPDATE'})
+    assert tracker.orders == {} and tracker.events == 0
+
+def test_untracked_orders_evicted_once_final(tracker):
+    # market close orders and cancel echoes after forget() must not pile up for the life of the process
+    tracker.on_user_event(event(7, 'NEW', order_type='MARKET'))
+    tracker.on_user_event(event(7, 'FILLED', order_type='MARKET'))
+    tracker.track(8)
+    tracker.forget(8)
+    tracker.on_user_event(event(8, 'CANCELED'))
+    assert tracker.orders == {} and tracker.events == 3
+
+def test_rest_fallback_backs_off(tracker, monkeypatch):
+    tracker.min_backoff, tracker.max_backoff = 2, 5
+    now = [1000.0]
+    monkeypatch.setattr('orders.time.time', lambda: now[0])
+    tracker.client.status[3] = 'NEW'
+    tracker.track(3)
+    assert tracker.get(3) is None and tracker.client.calls == 0   # first poll only after min_backoff
+    now[0] += 2
+    assert tracker.get(3)['status'] == 'NEW' and tracker.next_poll_in() == 4
+    now[0] += 4
+    tracker.client.status[3] = 'FILLED'
+    assert tracker.get(3)['status'] == 'FILLED' and tracker.next_poll_in() == 5   # capped at max_backoff
+    assert tracker.get(3)['status'] == 'FILLED' and tracker.client.calls == 2
@@ -0,0 +1,131 @@
+import sys, types
+import numpy as np
+import pytest
+import sentiment
+
+class Model:
+    # stub FinBERT: "up" headlines are positive, "down" negative; records every batch it scores
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, headlines):
+        self.batches.append(list(headlines))
+        return np.array([[0.8, 0.1, 0.1] if 'up' in h else [0.1, 0.8, 0.1] if 'down' in h else [0.2, 0.2, 0.6]
+                         for h in headlines])
+
+class Response:
+    def __init__(self, status_code, titles=(), headers=None):
+        self.status_code, self.content, self.headers = status_code, list(titles), headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400: raise ConnectionError(self.status_code)
+
+@pytest.fixture
+def feed(monkeypatch):
+    # the feed body is a list of titles; feedparser is stubbed to hand them back as entries
+    parse = lambda content: types.SimpleNamespace(entries=[types.SimpleNamespace(title=t) for t in content])
+    monkeypatch.setitem(sys.modules, 'feedparser', types.SimpleNamespace(parse=parse))
+
+def service(responses, **kw):
+    svc = sentiment.SentimentService(model=Model(), autostart=False, **kw)
+    svc.requests = []
+    def get(url, headers=None, timeout=None):
+        svc.requests.append(dict(headers))
+        return responses.pop(0)
+    svc.session.get = get
+    return svc
+
+def test_aggregate():
+    assert sentiment.aggregate(np.array([[0.8, 0.1], [0.1, 0.8], [0.6, 0.0]])) == pytest.approx(0.5 - 0.3)
+    assert sentiment.aggregate(np.empty((0, 3))) == 0.0
+
+def test_only_unseen_headlines_are_scored():
+    svc = service([])
+    assert svc.update(['btc up', 'eth down']) == pytest.approx(0.0)
+    assert svc.update(['btc up', 'sol up']) == pytest.approx(0.7)
+    assert svc.model.batches == [['btc up', 'eth down'], ['sol up']]
+    assert svc.scored == 3 and svc.hits == 1 and svc.score() == pytest.approx(0.7)
+
+def test_duplicate_headlines_scored_once():
+    svc = service([])
+    svc.update(['btc up', 'btc up', 'eth down'])
+    assert svc.model.batches == [['btc up', 'eth down']]
+    assert svc.value == pytest.approx((0.8 * 2 + 0.1) / 3 - (0.1 * 2 + 0.8) / 3)
+
+def test_lru_evicts_least_recently_used():
+    svc = service([], cache_size=2)
+    svc.update(['a up'])
+    svc.update(['b down'])
+    svc.update(['a up'])   # hit: a becomes the most recent
+    svc.update(['c up'])   # evicts b
+    assert svc.stats()['cached'] == 2
+    svc.update(['a up', 'b down'])
+    assert svc.model.batches == [['a up'], ['b down'], ['c up'], ['b down']]
+
+def test_etag_and_not_modified(feed):
+    svc = service([Response(200, ['btc up', 'eth down', 'sol up'], {'ETag': '"v1"', 'Last-Modified': 'Mon'}),
+                   Response(304),
+                   Response(200, ['btc up', 'xrp down'], {'ETag': '"v2"'})], max_headlines=2)
+    assert svc.refresh_now() == pytest.approx(0.0)   # newest two only
+    assert svc.refresh_now() == pytest.approx(0.0)   # 304 keeps the value, nothing scored
+    assert svc.requests[:2] == [{}, {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon'}]
+    assert svc.not_modified == 1 and svc.scored == 2
+    svc.refresh_now()
+    assert svc.requests[2] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon'} and svc.etag == '"v2"'
+    assert svc.model.batches == [['btc up', 'eth down'], ['xrp down']] and svc.fetches == 3
+
+def test_failed_fetch_keeps_validators_and_value(feed):
+    svc = service([Response(200, ['btc up'], {'ETag': '"v1"'}), Response(503)])
+    svc.refresh_now()
+    with pytest.raises(ConnectionError): svc.refresh_now()
+    assert svc.etag == '"v1"' and svc.value == pytest.approx(0.7)
+
+def test_model_loaded_lazily(feed):
+    loads = []
+    def loader():
+        loads.append(1)
+        return Model()
+    svc = sentiment.SentimentService(loader=loader, autostart=False)
+    svc.session.get = lambda url, **kw: Response(304)
+    assert not svc.stats()['model_loaded']
+    svc.refresh_now()
+    svc.refresh_now()
+    assert loads == [1] and svc.stats()['model_loaded']
+
+class Tokenizer:
+    def __call__(self, headlines, return_tensors, padding, truncation, max_length):
+        return {'input_ids': np.ones((len(headlines), max_length)), 'attention_mask': np.ones((len(headlines), max_length))}
+
+class Session:
+    def __init__(self, path, opts, providers):
+        self.path = path
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name='input_ids'), types.SimpleNamespace(name='attention_mask')]
+
+    def run(self, outputs, feed):
+        assert feed['input_ids'].dtype == np.int64
+        return [np.zeros((len(feed['input_ids']), 3))]
+
+@pytest.fixture
+def onnx_stack(monkeypatch):
+    tokenizer = types.SimpleNamespace(from_pretrained=lambda name: Tokenizer())
+    monkeypatch.setitem(sys.modules, 'transformers', types.SimpleNamespace(AutoTokenizer=tokenizer))
+    monkeypatch.setitem(sys.modules, 'onnxruntime', types.SimpleNamespace(SessionOptions=types.SimpleNamespace, InferenceSession=Session))
+    monkeypatch.setitem(sys.modules, 'torch', None)   # any torch import fails
+
+def test_cached_onnx_graph_loads_without_torch(onnx_stack, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = sentiment.onnx_cache_path(max_length=32)
+    open(path, 'wb').close()
+    predict = sentiment.load_finbert(backend='onnx', max_length=32)
+    assert predict(['a', 'b']).shape == (2, 3)
+
+def test_onnx_cache_keyed_by_model_and_length():
+    paths = {sentiment.onnx_cache_path(name, n) for name in ('org/a', 'org/b') for n in (32, 64)}
+    assert len(paths) == 4 and all('/' not in p for p in paths)
+
+def test_missing_onnx_graph_needs_the_export(onnx_stack, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ImportError): sentiment.load_finbert(backend='onnx', max_length=48)   # export imports torch
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,17 @@
+# The int8 / onnx parity check from `python sentiment.py --offline`, run when the
+# model stack is installed (it downloads FinBERT on first use)
+import os, subprocess, sys
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('transformers')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize('backend', ['int8', 'onnx'])
+def test_backend_matches_float_model(backend, tmp_path):
+    if backend == 'onnx': pytest.importorskip('onnxruntime')
+    # run from tmp_path so the exported graph does not land in the tree
+    r = subprocess.run([sys.executable, os.path.join(ROOT, 'sentiment.py'), '--offline', '--backend', backend, '--tol', '0.05'],
+                       cwd=tmp_path, capture_output=True, text=True, timeout=600)
+    assert r.returncode == 0, r.stdout + r.stderr
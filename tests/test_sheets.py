@@ -0,0 +1,104 @@
+import json, sys, types
+import pytest
+import sheets
+
+class Worksheet:
+    def __init__(self, fail=False, during=None):
+        self.rows, self.fail, self.during = [], fail, during
+
+    def append_rows(self, rows):
+        if self.during: self.during()
+        if self.fail: raise ConnectionError("sheets unreachable")
+        self.rows += rows
+
+class Stop(Exception):
+    pass
+
+@pytest.fixture
+def make(tmp_path, monkeypatch):
+    # no writer thread / atexit hook: the tests drive flush() and the _run loop themselves
+    monkeypatch.setattr(sheets.threading, 'Thread', lambda **kw: types.SimpleNamespace(start=lambda: None))
+    monkeypatch.setattr(sheets.atexit, 'register', lambda fn: None)
+    spool = tmp_path / 'spool.jsonl'
+    def make(ws=None, **kw):
+        logger = sheets.SheetLogger('sheet', '{}', spool_path=str(spool), **kw)
+        if ws is not None: logger.worksheet = lambda: ws
+        return logger
+    make.spool = spool
+    return make
+
+def datetime_like():
+    # a non-JSON cell, logged as its str()
+    class When:
+        def __str__(self): return 'when'
+    return When()
+
+def spooled(path):
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+def run_once(logger, monkeypatch):
+    # one pass of the writer loop; returns the sleeps it asked for
+    sleeps = []
+    def sleep(s):
+        sleeps.append(s)
+        if len(sleeps) > 1 and s == 1: raise Stop
+    monkeypatch.setattr(sheets.time, 'sleep', sleep)
+    with pytest.raises(Stop): logger._run()
+    return sleeps
+
+def test_spool_reloaded_on_start(make):
+    make.spool.write_text(json.dumps(['t1', 'BTCUSDT', 1.5]) + '\n' + json.dumps(['t2', 'ETHUSDT', None]) + '\n')
+    ws = Worksheet()
+    logger = make(ws)
+    assert logger._oldest is not None
+    assert logger.flush()
+    assert ws.rows == [['t1', 'BTCUSDT', 1.5], ['t2', 'ETHUSDT', None]]
+    assert spooled(make.spool) == [] and logger.flushed == 2
+
+def test_rows_logged_during_flush_stay_spooled(make):
+    ws = Worksheet()
+    logger = make(ws)
+    for i in range(3): logger.log([i, 'row'])
+    ws.during = lambda: logger.log([99, 'late'])
+    assert logger.flush()
+    assert ws.rows == [[0, 'row'], [1, 'row'], [2, 'row']]
+    assert logger._buf == [[99, 'late']] and spooled(make.spool) == [[99, 'late']]
+
+def test_failed_write_keeps_rows_and_reauthorizes(make, monkeypatch):
+    sheets_made = [Worksheet(fail=True), Worksheet()]
+    authorized = []
+    def authorize(creds):
+        authorized.append(creds)
+        ws = sheets_made[len(authorized) - 1]
+        return types.SimpleNamespace(open_by_key=lambda key: types.SimpleNamespace(sheet1=ws))
+    creds = types.SimpleNamespace(from_json_keyfile_dict=lambda d, scope: 'creds')
+    monkeypatch.setitem(sys.modules, 'gspread', types.SimpleNamespace(authorize=authorize))
+    monkeypatch.setitem(sys.modules, 'oauth2client', types.ModuleType('oauth2client'))
+    monkeypatch.setitem(sys.modules, 'oauth2client.service_account', types.SimpleNamespace(ServiceAccountCredentials=creds))
+    logger = make()
+    logger.log(['a', datetime_like()])
+    assert not logger.flush()
+    assert logger.failed == 1 and logger._ws is None and spooled(make.spool) == [['a', 'when']]
+    assert logger.flush()   # fresh authorize, same rows
+    assert len(authorized) == 2 and sheets_made[1].rows == [['a', 'when']] and logger._buf == []
+
+def test_flush_on_row_count(make, monkeypatch):
+    ws = Worksheet()
+    logger = make(ws, max_rows=3, max_age=30)
+    for i in range(2): logger.log([i])
+    run_once(logger, monkeypatch)
+    assert ws.rows == []
+    logger.log([2])
+    run_once(logger, monkeypatch)
+    assert ws.rows == [[0], [1], [2]]
+
+def test_flush_on_age_and_backoff(make, monkeypatch):
+    ws = Worksheet(fail=True)
+    logger = make(ws, max_rows=20, max_age=30)
+    logger.log(['old'])
+    assert run_once(logger, monkeypatch) == [1, 1]   # too young, nothing sent
+    logger._oldest -= 31
+    assert run_once(logger, monkeypatch) == [1, 30, 1]   # due, failed -> backs off max_age
+    ws.fail = False
+    run_once(logger, monkeypatch)
+    assert ws.rows == [['old']]
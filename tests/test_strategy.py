@@ -0,0 +1,30 @@
+import pytest
+import strategy
+from state import round_to_tick
+
+class Bands(strategy.Strategy):
+    name = 'bands'
+
+class Snap(dict):
+    symbol = 'SOLUSDT'
+
+def test_round_to_tick():
+    assert round_to_tick(64123.456, 0.1) == 64123.5
+    assert round_to_tick(142.3371, 0.01) == 142.34
+    assert round_to_tick(0.123456, 0.0001) == 0.1235
+    assert round_to_tick(2501.3, 0.5) == 2501.5
+
+def test_symbol_params_override_price_settings(monkeypatch, capsys):
+    monkeypatch.setenv('SYMBOL_PARAMS', '{"solusdt": {"entry_buffer": 0.02, "tp_offset": 1.5}}')
+    s = Bands('BTCUSDT,SOLUSDT:1,ETHUSDT:0.1')
+    assert s.param('SOLUSDT', 'entry_buffer') == 0.02 and s.param('SOLUSDT', 'spread_threshold') == 0.5
+    assert s.param('BTCUSDT', 'entry_buffer') == 0.8 and s.param('BTCUSDT', 'tp_offset') == 100
+    warned = capsys.readouterr().out
+    assert warned.count('⚠') == 1 and 'ETHUSDT' in warned and 'SOLUSDT' not in warned
+    snap = Snap({'5m': {'open': 140.0, 'bb_mid': 141.0, 'bb_high': 142.0, 'bb_low': 139.0}, '1h': {'open': 138.0}})
+    assert s.stops('trend_buy', snap) == (138.0, 143.5)
+    assert s.stops('reversal_sell', snap) == (140.0, 139.5)
+
+def test_unknown_symbol_param_rejected(monkeypatch):
+    monkeypatch.setenv('SYMBOL_PARAMS', '{"SOLUSDT": {"entry_bufer": 0.02}}')
+    with pytest.raises(ValueError): Bands('SOLUSDT')
@@ -0,0 +1,144 @@
+import pytest
+import streams
+from klines import KlineCache
+
+STEP = 300_000
+
+def kline(t, close):
+    return [t, str(close), str(close + 1), str(close - 1), str(close), "10", t + STEP - 1, "0", 1, "5", "0", "0"]
+
+class RestClient:
+    # futures_klines over a growing list of candles: what the REST backfill sees
+    def __init__(self, n=120):
+        self.rows = [kline(i * STEP, 100 + i) for i in range(n)]
+        self.calls = 0
+
+    def futures_klines(self, symbol, interval, limit=500, startTime=None, **kw):
+        self.calls += 1
+        rows = [r for r in self.rows if startTime is None or r[0] >= startTime]
+        return rows[:limit] if startTime is not None else rows[-limit:]
+
+class FakeManager:
+    # stands in for ThreadedWebsocketManager: keeps the callbacks so the test plays the server
+    def __init__(self, **kw):
+        self.kw, self.market, self.user, self.streams, self.stopped = kw, None, None, None, False
+
+    def start_futures_multiplex_socket(self, callback, streams):
+        self.market, self.streams = callback, streams
+
+    def start_futures_user_socket(self, callback):
+        self.user = callback
+
+    def stop(self):
+        self.stopped = True
+
+class FakeStream(streams.MarketStream):
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.managers = []
+
+    def _manager(self, **kw):
+        m = FakeManager(**kw)
+        self.managers.append(m)
+        return m
+
+    @property
+    def server(self):
+        return self.managers[-2]   # live market manager of the current connection
+
+def drain(ms):
+    out = []
+    while True:
+        ev = ms.next_event(0)
+        if ev is None: return out
+        out.append(ev)
+
+@pytest.fixture
+def setup():
+    client = RestClient()
+    cache = KlineCache(client, min_refresh=1e9)   # only the stream and the forced backfill move it
+    cache.sync('BTCUSDT', '5m')
+    ms = FakeStream('k', 's', ['BTCUSDT'], ('5m',), cache)
+    ms._running = True
+    ms._connect()
+    return ms, cache, client
+
+def test_subscribes_every_stream(setup):
+    ms, _, _ = setup
+    assert ms.server.streams == ['btcusdt@kline_5m', 'btcusdt@bookTicker', 'btcusdt@markPrice@1s']
+    assert ms.managers[-1].kw == {'testnet': True}
+
+def test_price_ticks_are_coalesced(setup):
+    ms, _, _ = setup
+    for i in range(5): ms.server.market({'data': {'e': 'bookTicker', 's': 'BTCUSDT', 'b': str(100 + i), 'a': str(101 + i)}})
+    assert drain(ms) == [('price', 'BTCUSDT', None)]
+    assert ms.price('BTCUSDT') == 104.5
+    ms.server.market({'data': {'e': 'bookTicker', 's': 'BTCUSDT', 'b': '200', 'a': '202'}})
+    assert drain(ms) == [('price', 'BTCUSDT', None)]   # queued again once consumed
+
+def test_klines_update_cache(setup):
+    ms, cache, _ = setup
+    last = cache.get('BTCUSDT', '5m')[-1][0]
+    for close, t in ((500, last), (501, last), (600, last + STEP)):
+        k = kline(t, close)
+        ms.server.market({'data': {'e': 'kline', 's': 'BTCUSDT', 'k': {
+            't': k[0], 'o': k[1], 'h': k[2], 'l': k[3], 'c': k[4], 'v': k[5], 'T': k[6], 'q': k[7],
+            'n': k[8], 'V': k[9], 'Q': k[10], 'i': '5m'}}})
+    assert drain(ms) == [('kline', 'BTCUSDT', None)]
+    rows = cache.get('BTCUSDT', '5m')
+    assert [r[0] for r in rows[-2:]] == [last, last + STEP]
+    assert rows[-2][4] == 501.0 and rows[-1][4] == 600.0   # forming candle replaced in place, next one appended
+
+def test_user_events(setup):
+    ms, _, _ = setup
+    ms.managers[-1].user({'e': 'error', 'm': 'x'})
+    msg = {'e': 'ORDER_TRADE_UPDATE', 'E': 1, 'o': {'s': 'BTCUSDT', 'i': 7}}
+    ms.managers[-1].user(msg)
+    ms.managers[-1].user({'e': 'ACCOUNT_UPDATE'})
+    assert drain(ms) == [('user', 'BTCUSDT', msg), ('user', None, {'e': 'ACCOUNT_UPDATE'})]
+
+def run_watchdog(ms, monkeypatch):
+    # one watchdog round: the second sleep ends the loop
+    sleeps = []
+    def sleep(s):
+        sleeps.append(s)
+        if len(sleeps) > 1: ms._running = False
+    monkeypatch.setattr(streams.time, 'sleep', sleep)
+    ms._watchdog()
+
+@pytest.mark.parametrize('trigger', ['stale', 'error'])
+def test_reconnect_backfills_and_resyncs(setup, monkeypatch, trigger):
+    ms, cache, client = setup
+    first = ms.server
+    last = cache.get('BTCUSDT', '5m')[-1][0]
+    client.rows += [kline(last + i * STEP, 900 + i) for i in range(1, 4)]   # candles missed while disconnected
+    if trigger == 'stale': ms.last_msg -= ms.stale_after + 1
+    else: ms.server.market({'e': 'error', 'm': 'closed'})
+    run_watchdog(ms, monkeypatch)
+    assert ms.reconnects == 1 and first.stopped and ms.server is not first
+    assert drain(ms) == [('resync', None, None)]
+    assert [r[4] for r in cache.get('BTCUSDT', '5m')[-3:]] == [901.0, 902.0, 903.0]
+
+def test_fresh_stream_is_left_alone(setup, monkeypatch):
+    ms, _, client = setup
+    calls = client.calls
+    run_watchdog(ms, monkeypatch)
+    assert ms.reconnects == 0 and client.calls == calls and drain(ms) == []
+
+def test_user_socket_error_reconnects_only_the_user_stream(setup, monkeypatch):
+    ms, _, client = setup
+    market, user = ms.server, ms.managers[-1]
+    calls = client.calls
+    user.user({'e': 'error', 'm': 'listenKey expired'})
+    run_watchdog(ms, monkeypatch)
+    assert ms.user_reconnects == 1 and ms.reconnects == 0
+    assert user.stopped and not market.stopped and ms.managers[-1] is not user and ms.managers[-1].user
+    assert client.calls == calls and drain(ms) == [('resync', None, None)]
+
+def test_silent_user_socket_is_renewed(setup, monkeypatch):
+    ms, _, _ = setup
+    ms.managers[-1].user({'e': 'ACCOUNT_UPDATE'})
+    drain(ms)
+    ms.last_user_msg -= ms.user_stale_after + 1
+    run_watchdog(ms, monkeypatch)
+    assert ms.user_reconnects == 1 and drain(ms) == [('resync', None, None)]
@@ -0,0 +1,185 @@
+# 🎯 Tick-level exit simulator
+# The candle backtest has to guess the intra-bar order of high and low, and the
+# live bot only samples a price for manage_trade every LOOP_INTERVAL seconds.
+# This replays stop fills and the SL/TP/tiered-trailing exits of manage_trade on
+# real ticks (Binance aggTrades dumps, or 1s klines walked like backtest.bar_path):
+#  - entries (signal time, stop, SL, TP) come from backtest.run on 5m candles,
+#    given with --candles or resampled from the ticks themselves
+#  - each fill is the first tick through the stop while the candle replay had it
+#    working: from the signal (or its last amendment) to the close of its fill bar
+#  - exits run through a NumPy kernel over chunks of ticks that reproduces
+#    backtest.exit_check exactly: tier, running peak and trail stop are prefix
+#    scans, so a trade costs a few array passes instead of a Python call per tick
+#  - the same kernel on prices sampled every --poll seconds gives the exits the
+#    polling bot would have taken; the difference is what the cadence costs
+# --verify replays every trade through exit_check tick by tick as well and fails
+# on any mismatch, so it doubles as a regression harness for exit-logic changes.
+#   python ticksim.py data/aggTrades/ --poll 120 30 5 1
+#   python ticksim.py data/1s/ --klines-1s --candles data/5m/ --strategy tb --verify
+import argparse, glob, os, time
+import numpy as np, pandas as pd
+import backtest
+
+CHUNK = 1 << 14   # ticks per kernel pass; grows x4 while a trade stays open
+
+# 📂 Ticks
+def _files(paths):
+    files = sorted(f for p in paths for f in (glob.glob(os.path.join(p, '*.csv')) if os.path.isdir(p) else glob.glob(p)))
+    if not files: raise FileNotFoundError(f"no tick files in {paths}")
+    return files
+
+def load_agg_trades(paths):
+    # agg_trade_id, price, quantity, first_trade_id, last_trade_id, transact_time, is_buyer_maker
+    df = pd.concat([pd.read_csv(f, header=None, usecols=[1, 2, 5, 6], low_memory=False) for f in _files(paths)], ignore_index=True)
+    df[6] = df[6].astype(str).str.lower() == 'true'
+    df[[1, 2, 5]] = df[[1, 2, 5]].apply(pd.to_numeric, errors='coerce')
+    df = df.dropna().sort_values(5, kind='stable')   # drops header rows of newer dumps
+    return {'time': df[5].to_numpy(np.int64), 'price': df[1].to_numpy(float),
+            'qty': df[2].to_numpy(float), 'taker_buy': ~df[6].to_numpy(bool)}
+
+def load_klines_1s(paths):
+    # each 1s bar becomes four ticks 250 ms apart, walked open -> low -> high -> close (bullish) like bar_path
+    c = backtest.load_candles(_files(paths))
+    o, h, l, cl = c['open'], c['high'], c['low'], c['close']
+    up = cl >= o
+    px = np.stack([o, np.where(up, l, h), np.where(up, h, l), cl], axis=1).ravel()
+    t = (c['time'][:, None] + np.arange(4) * 250).ravel()
+    q = np.repeat(c['volume'] / 4, 4)
+    tb = np.repeat(c['taker_buy_base'] > c['volume'] / 2, 4)
+    return {'time': t, 'price': px, 'qty': q, 'taker_buy': tb}
+
+def to_candles(ticks, step=backtest.MIN5):
+    # 5m candles in load_candles form, for entries when no --candles are given
+    t, px, q = ticks['time'], ticks['price'], ticks['qty']
+    b = t // step
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    ends = np.r_[starts[1:], len(t)]
+    return {'time': b[starts] * step, 'open': px[starts], 'close': px[ends - 1],
+            'high': np.maximum.reduceat(px, starts), 'low': np.minimum.reduceat(px, starts),
+            'volume': np.add.reduceat(q, starts), 'taker_buy_base': np.add.reduceat(np.where(ticks['taker_buy'], q, 0.0), starts)}
+
+# 🔄 Exit kernel
+def exit_scan(px, pos, tiers, sticky=True):
+    # Vectorized exit_check over consecutive prices. pos = [entry, is_long, sl, tp, peak, trail_stop, trail_pct]
+    # is advanced to the state after the last price examined; returns (index, EXIT_REASONS index) or (-1, -1).
+    entry, is_long, sl, tp, peak, stop0, trail0 = pos
+    n, ar = len(px), np.arange(len(px))
+    pct = np.abs((px - entry) / entry)
+    tier = np.full(n, np.nan)
+    for level, trail in sorted(tiers):   # ascending: the highest level reached wins, as in exit_check
+        tier[pct >= level] = trail
+    at = np.maximum.accumulate(np.where(np.isnan(tier), -1, ar))
+    # sticky: the last tier reached holds below the lowest level; else the trail drops to none there
+    trail = np.where(at >= 0, tier[np.maximum(at, 0)], trail0) if sticky else np.nan_to_num(tier)
+    # new peak: strictly beyond everything before it (peak None -> the first price is one)
+    if is_long:
+        newpk = px > np.maximum.accumulate(np.r_[-np.inf if peak is None else peak, px[:-1]])
+    else:
+        newpk = px < np.minimum.accumulate(np.r_[np.inf if peak is None else peak, px[:-1]])
+    last = np.maximum.accumulate(np.where(newpk, ar, -1))
+    li = np.maximum(last, 0)
+    carried = np.nan if stop0 is None else stop0
+    stop = np.where(last >= 0, px[li] * ((1 - trail[li]) if is_long else (1 + trail[li])), carried)
+    ok = (trail != 0) & ~np.isnan(stop) & (stop != 0)
+    if is_long:
+        hits = (ok & (px <= stop), (px >= tp) if tp else np.zeros(n, bool), (px <= sl) if sl else np.zeros(n, bool))
+    else:
+        hits = (ok & (px >= stop), (px <= tp) if tp else np.zeros(n, bool), (px >= sl) if sl else np.zeros(n, bool))
+    reason = np.select(hits, (0, 1, 2), -1)
+    fired = np.flatnonzero(reason >= 0)
+    k = int(fired[0]) if len(fired) else n - 1
+    if last[k] >= 0: pos[4], pos[5] = float(px[last[k]]), float(stop[k])
+    pos[6] = float(trail[k])
+    return (k, int(reason[k])) if len(fired) else (-1, -1)
+
+def scan(px, start, pos, tiers, sticky=True):
+    # exit_scan from tick `start` on, in growing chunks so short trades touch few ticks
+    i, size = start, CHUNK
+    while i < len(px):
+        k, reason = exit_scan(px[i:i + size], pos, tiers, sticky)
+        if reason >= 0: return i + k, reason
+        i += size
+        size *= 4
+    return len(px) - 1, 3
+
+def scan_reference(px, start, pos, tiers, sticky=True):
+    # same result through backtest.exit_check one price at a time (for --verify)
+    for i in range(start, len(px)):
+        reason = backtest.exit_check(pos, float(px[i]), tiers, sticky)
+        if reason >= 0: return i, reason
+    return len(px) - 1, 3
+
+# 🚀 Replay
+def fill(ticks, trade):
+    # first tick through the stop after the signal, before backtest.run's fill bar closed -> tick index or -1
+    # (expiry and amendments were decided there, at bar closes, as PendingOrders does live)
+    t, px = ticks['time'], ticks['price']
+    a, b = np.searchsorted(t, trade['signal_time']), np.searchsorted(t, trade['entry_time'] + backtest.MIN5)
+    through = px[a:b] >= trade['stop'] if trade['signal'] in (backtest.TREND_BUY, backtest.REVERSAL_BUY) else px[a:b] <= trade['stop']
+    hit = np.flatnonzero(through)
+    return a + int(hit[0]) if len(hit) else -1
+
+def replay(ticks, entries, tiers, poll=None, reference=False, sticky=True):
+    # -> structured array like backtest.run; poll=None is tick-accurate, else exits only see a price every poll s
+    t, px = ticks['time'], ticks['price']
+    out = []
+    for tr in entries:
+        f = fill(ticks, tr)
+        if f < 0: continue
+        is_long = tr['signal'] in (backtest.TREND_BUY, backtest.REVERSAL_BUY)
+        entry = float(px[f])
+        pos = [entry, is_long, float(tr['sl']), float(tr['tp']), entry, None, 0.0]
+        if poll is None:
+            idx, series, start = None, px, f
+        else:
+            # price the bot reads at each poll: the last tick at or before it
+            samples = np.arange(t[f], t[-1] + 1, poll * 1000)
+            idx = np.searchsorted(t, samples, 'right') - 1
+            series, start = px[idx], 0
+        k, reason = (scan_reference if reference else scan)(series, start, pos, tiers, sticky)
+        exit_px = float(series[k])
+        pnl = round((exit_px - entry) if is_long else (entry - exit_px), 2)
+        out.append((tr['signal_time'], t[f], t[k] if idx is None else samples[k], tr['signal'],
+                    tr['stop'], tr['sl'], tr['tp'], entry, exit_px, pnl, reason))
+    return np.array(out, dtype=backtest.TRADE_DTYPE)
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay stop fills and SL/TP/trailing exits on ticks, tick-accurate vs polled")
+    ap.add_argument('paths', nargs='+', help="aggTrades CSVs (files, globs or directories)")
+    ap.add_argument('--klines-1s', action='store_true', help="paths are 1s kline CSVs instead of aggTrades")
+    ap.add_argument('--candles', nargs='+', help="5m kline CSVs for the entry signals (default: resampled ticks)")
+    ap.add_argument('--strategy', choices=sorted(backtest.PRESETS), default='tba')
+    ap.add_argument('--poll', type=float, nargs='*', default=[120], help="polling cadences (s) to compare against ticks")
+    ap.add_argument('--verify', action='store_true', help="cross-check the kernel against backtest.exit_check")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    ticks = load_klines_1s(args.paths) if args.klines_1s else load_agg_trades(args.paths)
+    candles = backtest.load_candles(args.candles) if args.candles else to_candles(ticks)
+    p = {**backtest.DEFAULTS, **backtest.PRESETS[args.strategy]}
+    tiers, sticky = sorted(p['trail_tiers'], reverse=True), p['sticky_trail']
+    entries = backtest.run(backtest.prepare(candles), args.strategy)
+    print(f"{len(ticks['price']):,} ticks, {len(entries)} entries from the candle replay ({time.perf_counter() - t0:.1f}s to load)")
+
+    t0 = time.perf_counter()
+    exact = replay(ticks, entries, tiers, sticky=sticky)
+    dt = time.perf_counter() - t0
+    scanned = int(sum(np.searchsorted(ticks['time'], x, 'right') - np.searchsorted(ticks['time'], e) for e, x in zip(exact['entry_time'], exact['exit_time'])))
+    print(f"tick-accurate replay: {dt:.3f}s, {scanned / dt / 1e6:.1f}M ticks/s scanned")
+    rows = {'ticks': exact}
+    for s in args.poll: rows[f'poll {s:g}s'] = replay(ticks, entries, tiers, poll=s, sticky=sticky)
+    print(f"{'exits':<12}{'trades':>7}{'pnl':>11}{'win %':>7}{'trail':>7}{'tp':>5}{'sl':>5}{'open':>5}{'vs ticks':>10}")
+    for name, tr in rows.items():
+        s = backtest.summarize(tr)
+        r = list(s['by_reason'].values())
+        print(f"{name:<12}{s['trades']:>7}{s['pnl']:>11.2f}{s['win_rate']:>7.1f}{r[0]:>7}{r[1]:>5}{r[2]:>5}{r[3]:>5}"
+              f"{s['pnl'] - float(exact['pnl'].sum()):>10.2f}")
+
+    if args.verify:
+        ref = replay(ticks, entries, tiers, reference=True, sticky=sticky)
+        bad = np.flatnonzero((ref['reason'] != exact['reason']) | (ref['exit_time'] != exact['exit_time']) | (ref['exit'] != exact['exit']))
+        if len(bad): raise SystemExit(f"kernel and exit_check disagree on {len(bad)} of {len(ref)} trades, first at signal {ref['signal_time'][bad[0]]}")
+        print(f"verify: kernel matches exit_check on all {len(ref)} trades")
+
+if __name__ == "__main__":
+    main()